@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-18 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_household_generation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="household",
+            name="changed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-18 16:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_household_changed_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="household",
+            name="sync_floor",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
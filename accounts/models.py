@@ -8,6 +8,12 @@ class Household(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=120)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Se incrementa con cada cambio en los datos del household (core/generations.py)
+    generation = models.BigIntegerField(default=0, editable=False)
+    changed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Generación hasta la que se han purgado lápidas de SyncEntry (prune_sync_tombstones):
+    # un /sync/?since= anterior ya no puede saber qué se borró y recibe todo de nuevo
+    sync_floor = models.BigIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
@@ -0,0 +1,39 @@
+# categorization/services.py
+from django.db.models import Value
+from django.db.models.functions import Lower
+
+from .models import Tag
+
+
+def get_or_create_tags_by_name(household_id, names) -> dict:
+    """
+    Equivalente por lotes de get_or_create(household, name) para Tag, case-insensitive:
+    una consulta por Lower(name) + un bulk_create para los nuevos (respetando
+    uniq_tag_household_lower_name). Devuelve {nombre_en_minúsculas: Tag}.
+    """
+    wanted = {}
+    for name in names:
+        wanted.setdefault(name.lower(), name)
+    if not wanted:
+        return {}
+
+    def lookup(names):
+        # LOWER(name) = LOWER(%s), las dos en la BD (como la restricción única): el
+        # LOWER de SQLite solo cambia letras ASCII, así que comparar con el str.lower()
+        # de Python no encontraría "ÑOQUIS". El resultado se indexa con el de Python.
+        return {
+            t.name.lower(): t
+            for t in Tag.objects.annotate(lname=Lower("name")).filter(
+                household_id=household_id, lname__in=[Lower(Value(name)) for name in names]
+            )
+        }
+
+    found = lookup(wanted.values())
+    missing = [key for key in wanted if key not in found]
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(household_id=household_id, name=wanted[key]) for key in missing],
+            ignore_conflicts=True,
+        )
+        found.update(lookup(wanted[key] for key in missing))
+    return found
@@ -47,6 +47,8 @@ INSTALLED_APPS = [
     "places",
     "visits",
     "foods",
+    # Al final: sus señales (contadores, generaciones) deben ir detrás de las de cada app
+    "core",
 ]
 
 MIDDLEWARE = [
@@ -90,11 +92,17 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.SearchFilter",
+        "core.search.NormalizedSearchFilter",  # ?search= sin mayúsculas ni acentos, con índice
         "rest_framework.filters.OrderingFilter",
     ],
-    # 🔹 Paginación por defecto
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    # 🔹 JSON con orjson (igual que rest_framework.renderers.JSONRenderer salvo los floats
+    #    con exponente, 1e16 en vez de 1e+16; se puede volver a poner aquí si hiciera falta)
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    # 🔹 Paginación por defecto (por páginas; ?cursor= activa keyset, ver core/pagination.py)
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.PageOrCursorPagination",
     "PAGE_SIZE": 20,  # puedes ajustar el número por defecto
     "EXCEPTION_HANDLER": "rest_framework.views.exception_handler",
     "DEFAULT_THROTTLE_CLASSES": [
@@ -107,6 +115,23 @@ REST_FRAMEWORK = {
     },
 }
 
+# 🔹 Caché de respuestas de lectura (list/retrieve de HouseholdScopedViewSet).
+# Backends: core.cache.LRUResponseCache (en memoria, por proceso) o
+# core.cache.DjangoCacheResponseCache (compartido, usa CACHES[ALIAS]). None la desactiva.
+RESPONSE_CACHE = {
+    "BACKEND": os.getenv("RESPONSE_CACHE_BACKEND", "core.cache.LRUResponseCache"),
+    "OPTIONS": {
+        "MAX_BYTES": int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+    },
+}
+
+# 🔹 Índice de nombres de Food en memoria (autocompletado), por proceso:
+# nº máximo de households (LRU) y segundos de vida de cada índice.
+FOOD_NAME_INDEX = {
+    "MAX_HOUSEHOLDS": int(os.getenv("FOOD_NAME_INDEX_MAX_HOUSEHOLDS", 256)),
+    "TTL": int(os.getenv("FOOD_NAME_INDEX_TTL", 60)),
+}
+
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
 LOGGING = {
@@ -7,6 +7,8 @@ from categorization.api import PlaceTypeViewSet, TagViewSet
 from places.api import PlaceViewSet
 from visits.api import VisitViewSet
 from foods.api import FoodViewSet, VisitFoodViewSet
+from core.batch import BatchView
+from core.sync import SyncView
 
 router = DefaultRouter()
 router.register(r"areas", AreaViewSet, basename="area")
@@ -19,6 +21,8 @@ router.register(r"visit-foods", VisitFoodViewSet, basename="visitfood")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("sync/", SyncView.as_view(), name="sync"),
+    path("batch/", BatchView.as_view(), name="batch"),
     path("auth/", include("rest_framework.urls")),  # opcional (login de DRF)
     path("auth/jwt/", include("config.v1_urls_jwt")),  # JWT endpoints
 ]
@@ -1,19 +1,288 @@
 # core/api.py
+import hashlib
+from itertools import islice
+
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
-from django.db.models import Q
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_response_cache, request_signature, response_cache_key
+from .fastlist import compile_fast_list
+from .renderers import STREAM_CHUNK_SIZE, streaming_json_response
+from .generations import get_generation_state
+
+
+class ConditionalGetMixin:
+    """
+    GET condicional (ETag / If-None-Match y Last-Modified / If-Modified-Since) en
+    list y retrieve. Si nada ha cambiado responde 304 sin consultar ni serializar filas.
+
+    La huella por defecto es COUNT + MAX(fingerprint_field) del queryset filtrado
+    (una consulta agregada); los hijos pueden dar una más barata con get_fingerprint().
+    """
+    fingerprint_field = "updated_at"
+
+    def list(self, request, *args, **kwargs):
+        return self._not_modified(request) or super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._not_modified(request) or super().retrieve(request, *args, **kwargs)
+
+    def get_fingerprint(self, request):
+        """(token, last_modified|None) que cambia siempre que cambie la respuesta."""
+        qs = self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            qs = qs.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        agg = qs.order_by().aggregate(rows=Count("pk"), last=Max(self.fingerprint_field))
+        last = agg["last"]
+        return f"{agg['rows']}:{last.isoformat() if last else ''}", last
+
+    def _not_modified(self, request):
+        token, last_modified = self.get_fingerprint(request)
+        raw = f"{token}:{request_signature(request)}"
+        etag = quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        self._conditional_headers = (etag, timestamp)
+        return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        headers = getattr(self, "_conditional_headers", None)
+        if headers and response.status_code in (200, 304):
+            etag, timestamp = headers
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
+
+
+class ResponseCacheMixin:
+    """
+    Cachea las respuestas JSON de list/retrieve (ver core/cache.py). La clave
+    incluye get_cache_scope(), que debe cambiar siempre que cambien los datos.
+    """
+    cache_responses = True  # <- los hijos lo desactivan si su respuesta no depende solo del scope
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request) or super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(request) or super().retrieve(request, *args, **kwargs)
+
+    def get_cache_scope(self, request) -> str:
+        """Por defecto, el household del usuario y su generación (cambia con cada escritura)."""
+        household_id = request.user.profile.household_id
+        generation, _ = get_generation_state(household_id)
+        return f"{household_id}:{generation}"
+
+    def _cached_response(self, request):
+        """Respuesta cacheada si la hay; si no, deja apuntada la clave para guardarla."""
+        self._response_cache_key = None
+        cache = get_response_cache()
+        # Solo JSON: la API navegable lleva datos de sesión (usuario, CSRF). Tampoco
+        # dentro de una transacción (p. ej. /batch/ atómico): la generación que se ve
+        # aún no está confirmada, y si hace rollback otra transacción la reutilizará.
+        if (
+            cache is None or not self.cache_responses or request.accepted_renderer.format != "json"
+            or transaction.get_connection().in_atomic_block
+        ):
+            return None
+
+        key = response_cache_key(self.get_cache_scope(request), request)
+        entry = cache.get(key)
+        if entry is not None:
+            content, content_type = entry
+            return HttpResponse(content, content_type=content_type)
+        self._response_cache_key = key
+        return None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "_response_cache_key", None)
+        if key and isinstance(response, Response) and response.status_code == 200:
+            response.render()
+            get_response_cache().set(key, response.content, response["Content-Type"])
+        return response
+
+
+class SparseFieldsetMixin:
+    """
+    ?fields=a,b (solo esos campos) y/o ?omit=c,d (todos menos esos) en list/retrieve:
+    - recorta el serializer;
+    - carga solo las columnas necesarias (.only), si todos los campos son de modelo;
+    - hace los prefetch de sparse_prefetch solo si se pide su campo.
+    """
+    sparse_prefetch = {}  # <- campo del serializer -> lookups de prefetch_related
+
+    def get_sparse_fields(self):
+        """Campos pedidos (en el orden del serializer), o None si no hay recorte."""
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = self._parse_sparse_fields()
+        return self._sparse_fields
 
-class HouseholdScopedViewSet(viewsets.ModelViewSet):
+    def _parse_sparse_fields(self):
+        params = self.request.query_params
+        if self.action not in ("list", "retrieve") or not (params.get("fields") or params.get("omit")):
+            return None
+
+        available = list(self.get_serializer_class()().fields)
+        requested = {f.strip() for f in params.get("fields", "").split(",") if f.strip()}
+        omitted = {f.strip() for f in params.get("omit", "").split(",") if f.strip()}
+        unknown = (requested | omitted) - set(available)
+        if unknown:
+            raise ValidationError({"fields": f"Campos desconocidos: {', '.join(sorted(unknown))}."})
+        return [f for f in available if (not requested or f in requested) and f not in omitted]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        fields = self.get_sparse_fields()
+        for field, lookups in self.sparse_prefetch.items():
+            if fields is None or field in fields:
+                qs = qs.prefetch_related(*lookups)
+        if fields is not None:
+            columns = self._sparse_columns(qs, fields)
+            if columns is not None:
+                qs = qs.only(*columns)
+        return qs
+
+    def _sparse_columns(self, qs, fields):
+        """Columnas para .only(), o None si algún campo no se puede mapear a una columna."""
+        serializer_fields = self.get_serializer_class()().fields
+        model = qs.model
+        columns = {model._meta.pk.name}
+        for name in fields:
+            source = serializer_fields[name].source
+            if source == "*":
+                return None
+            try:
+                field = model._meta.get_field(source.split(".")[0])
+            except FieldDoesNotExist:
+                return None  # propiedad o método del modelo: no sabemos qué columnas usa
+            if field.many_to_many or field.one_to_many:
+                continue  # viene del prefetch
+            if not field.concrete:
+                return None
+            columns.add(field.name)
+        # Las relaciones de select_related no se pueden diferir
+        if qs.query.select_related is True:
+            return None
+        if qs.query.select_related:
+            columns.update(qs.query.select_related)
+        return columns
+
+
+class FastListMixin:
+    """
+    list de solo lectura sin instancias de modelo ni serializer: values_list() y
+    conversores precompilados (core/fastlist.py), con el mismo JSON que el camino normal.
+    Se cae al camino normal si el serializer tiene campos que no sabe convertir o si
+    se pagina con ?cursor= (el keyset necesita las instancias).
+    """
+    fast_list = False  # <- los hijos lo activan si su serializer es "plano"
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_fast_list_plan(request)
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = plan.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+        return Response(plan.serialize(rows))
+
+    def get_fast_list_plan(self, request):
+        if not self.fast_list:
+            return None
+        if getattr(self.paginator, "cursor_query_param", None) in request.query_params:
+            return None
+        fields = self.get_sparse_fields() if hasattr(self, "get_sparse_fields") else None
+        return compile_fast_list(self.get_serializer_class(), fields)
+
+
+class StreamingListMixin:
+    """
+    ?stream=true en list: el listado filtrado entero (sin paginar) como array JSON en
+    StreamingHttpResponse, escrito por trozos de STREAM_CHUNK_SIZE filas, sin llegar
+    a tenerlo todo en memoria. Pensado para exportaciones.
+    """
+    stream_query_param = "stream"
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.stream_query_param, "").lower() not in ("true", "1", "yes"):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_json_response(self._stream_chunks(request, queryset))
+
+    def _stream_chunks(self, request, queryset):
+        plan = self.get_fast_list_plan(request) if hasattr(self, "get_fast_list_plan") else None
+        if plan is not None:
+            rows = plan.values(queryset).iterator(chunk_size=STREAM_CHUNK_SIZE)
+            serialize = plan.serialize
+        else:
+            rows = queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+            def serialize(chunk):
+                return self.get_serializer(chunk, many=True).data
+        while chunk := list(islice(rows, STREAM_CHUNK_SIZE)):
+            yield serialize(chunk)
+
+
+class HouseholdScopedViewSet(
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    SparseFieldsetMixin,
+    StreamingListMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     """
     - Filtra por household del usuario.
     - (Opcional) Incluye filas globales (household=NULL) en lectura si include_global_readonly=True.
     - Auto-asigna household/author en creaciones.
     - Bloquea mutaciones sobre filas globales.
+    - list/retrieve: ETag/Last-Modified y caché de respuestas a partir de la generación
+      del household (cualquier cambio en sus datos la incrementa, ver core/generations.py).
+    - list/retrieve: ?fields= / ?omit= para devolver solo parte de los campos.
+    - list: serialización rápida desde values_list() si el hijo activa fast_list.
+    - list: ?stream=true para exportar el listado entero en streaming.
     """
     permission_classes = [IsAuthenticated]
     include_global_readonly = False  # <- los hijos lo activan si quieren incluir globales en lectura
 
+    def _household_state(self):
+        """(household_id, generation, changed_at), una consulta por petición."""
+        if not hasattr(self, "_household_state_cache"):
+            household_id = self.request.user.profile.household_id
+            self._household_state_cache = (household_id, *get_generation_state(household_id))
+        return self._household_state_cache
+
+    def get_fingerprint(self, request):
+        household_id, generation, changed_at = self._household_state()
+        return f"{household_id}:{generation}", changed_at
+
+    def get_cache_scope(self, request) -> str:
+        household_id, generation, _ = self._household_state()
+        return f"{household_id}:{generation}"
+
     def get_queryset(self):
         qs = super().get_queryset()
         user = self.request.user
@@ -45,8 +314,7 @@ class HouseholdScopedViewSet(viewsets.ModelViewSet):
         serializer.save(**data)
 
     def perform_update(self, serializer):
-        instance = self.get_object()
-        self._forbid_if_global(instance)
+        self._forbid_if_global(serializer.instance)  # ya cargada por update() con get_object()
         super().perform_update(serializer)
 
     def perform_destroy(self, instance):
@@ -0,0 +1,235 @@
+# core/batch.py
+import io
+import logging
+import re
+from urllib.parse import urlencode
+
+import orjson
+from django.db import transaction
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .renderers import dumps
+
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/api/v1/"
+BATCH_MAX_OPERATIONS = 50
+
+# Rutas de v1 que no se pueden llamar desde un batch
+EXCLUDED_PREFIXES = ("batch/", "auth/")
+
+# Cabeceras de la petición externa que no pasan a las subpeticiones: la auth ya está
+# hecha, y el cuerpo y las condiciones (If-None-Match...) son de cada operación.
+DROPPED_META = ("HTTP_AUTHORIZATION", "HTTP_COOKIE", "CONTENT_TYPE", "CONTENT_LENGTH", "QUERY_STRING")
+DROPPED_META_PREFIXES = ("HTTP_IF_", "wsgi.")
+
+# Recálculos que dentro de una transacción esperan al on_commit. En un batch atómico
+# se adelantan antes de cada GET, para que lea las métricas ya al día (son idempotentes).
+DEFERRED_FLUSHES = (
+    "visits.services.flush_dirty_places",
+    "foods.services.flush_food_place_dirty",
+)
+
+# "{{ref.campo.subcampo}}": valor de la respuesta de una operación anterior
+REFERENCE = re.compile(r"\{\{\s*([A-Za-z_][\w-]*)((?:\.[\w-]+)*)\s*\}\}")
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    ref = serializers.RegexField(r"^[A-Za-z_][\w-]*$", max_length=64, required=False)
+    method = serializers.ChoiceField(["GET", "POST", "PUT", "PATCH", "DELETE"])
+    path = serializers.CharField(max_length=2000)
+    query = serializers.DictField(required=False)
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    atomic = serializers.BooleanField(default=False)
+    operations = BatchOperationSerializer(many=True, allow_empty=False, max_length=BATCH_MAX_OPERATIONS)
+
+    def validate_operations(self, operations):
+        refs = [op["ref"] for op in operations if "ref" in op]
+        if len(refs) != len(set(refs)):
+            raise serializers.ValidationError("Los ref deben ser únicos dentro del batch.")
+        return operations
+
+
+class UnresolvedReference(Exception):
+    pass
+
+
+class _Rollback(Exception):
+    pass
+
+
+def resolve_references(value, results):
+    """
+    Sustituye las referencias "{{ref.campo}}" de value (strings, listas y dicts, en
+    profundidad). Si el string es solo la referencia se usa el valor tal cual (número,
+    null...); si va dentro de un texto ("places/{{p.id}}/"), convertido a texto.
+    """
+    if isinstance(value, dict):
+        return {key: resolve_references(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, results) for item in value]
+    if not isinstance(value, str) or "{{" not in value:
+        return value
+
+    whole = REFERENCE.fullmatch(value.strip())
+    if whole:
+        return _lookup(whole, results)
+    return REFERENCE.sub(lambda match: str(_lookup(match, results)), value)
+
+
+def _lookup(match, results):
+    ref, path = match.group(1), match.group(2)
+    if ref not in results:
+        raise UnresolvedReference(f"La operación {ref!r} no existe, no se ha ejecutado o ha fallado.")
+    value = results[ref]
+    for key in path.split(".")[1:]:
+        if isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        elif isinstance(value, dict) and key in value:
+            value = value[key]
+        else:
+            raise UnresolvedReference(f"La respuesta de {ref!r} no tiene {match.group(0)}.")
+    return value
+
+
+class BatchView(APIView):
+    """
+    POST /api/v1/batch/
+
+    Varias operaciones de la API v1 en una sola petición HTTP, ejecutadas en orden y
+    en el mismo proceso (resolver de URLs + vista, sin middleware). La autenticación
+    se hace una vez para todo el batch y el usuario (con su profile y household) se
+    comparte entre las subpeticiones.
+
+        {"atomic": true, "operations": [
+            {"ref": "p", "method": "POST", "path": "places/", "body": {"name": "Casa Pepe", …}},
+            {"method": "POST", "path": "visits/", "body": {"place": "{{p.id}}", …}},
+            {"method": "GET", "path": "places/{{p.id}}/", "query": {"fields": "id,visits_count"}}
+        ]}
+
+    - path: relativo a /api/v1/ (también vale con el prefijo). Con "query" o "?…".
+    - ref: nombre para usar su respuesta en las siguientes ("{{p.id}}", "{{p.tags.0}}").
+    - atomic=true: todo en una transacción; la primera operación que no devuelve
+      2xx deshace todas y el batch se para ahí ("committed": false).
+    - atomic=false (por defecto): cada operación va por su cuenta, como si fueran
+      llamadas separadas; las que dependen de una que falló devuelven 424, y un
+      error inesperado en una operación se devuelve como 500 en su entrada.
+
+    Responde 200 con el resultado de cada operación ejecutada, en orden:
+        {"atomic": true, "committed": true, "results": [{"ref": "p", "status": 201, "body": {…}}, …]}
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = BatchSerializer  # para el esquema OpenAPI
+
+    def post(self, request):
+        ser = BatchSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        atomic, operations = ser.validated_data["atomic"], ser.validated_data["operations"]
+
+        # Profile y household se cargan una vez: las subpeticiones comparten este user
+        request.user.profile.household
+        if not atomic:
+            results = self._run(request, operations, stop_on_error=False)
+            return Response({"atomic": False, "committed": True, "results": results})
+
+        results = []
+        try:
+            with transaction.atomic():
+                results = self._run(request, operations, stop_on_error=True)
+                if results and not 200 <= results[-1]["status"] < 300:
+                    raise _Rollback
+        except _Rollback:
+            return Response({"atomic": True, "committed": False, "results": results})
+        return Response({"atomic": True, "committed": True, "results": results})
+
+    def _run(self, request, operations, stop_on_error):
+        results, bodies = [], {}
+        for op in operations:
+            if op["method"] == "GET" and transaction.get_connection().in_atomic_block:
+                for flush in DEFERRED_FLUSHES:
+                    import_string(flush)()
+            try:
+                status, body = self._perform(request, op, bodies)
+            except UnresolvedReference as exc:
+                status, body = 424, {"detail": str(exc)}
+            except Exception:
+                # En un batch atómico el error sube y deshace todo (500). Si no, las
+                # operaciones anteriores ya están guardadas: se informa solo de esta.
+                if stop_on_error:
+                    raise
+                logger.exception("Error en la operación %s %s de un batch", op["method"], op["path"])
+                status, body = 500, {"detail": "Error interno del servidor."}
+
+            result = {"status": status, "body": body}
+            if "ref" in op:
+                result = {"ref": op["ref"], **result}
+                if 200 <= status < 300:
+                    bodies[op["ref"]] = body
+            results.append(result)
+            if stop_on_error and not 200 <= status < 300:
+                break
+        return results
+
+    def _perform(self, request, op, bodies):
+        path = resolve_references(op["path"], bodies)
+        query = resolve_references(op.get("query") or {}, bodies)
+        body = resolve_references(op.get("body"), bodies)
+
+        path, _, raw_query = path.partition("?")
+        relative = path.removeprefix(API_PREFIX).lstrip("/")
+        if relative.startswith(EXCLUDED_PREFIXES):
+            return 400, {"detail": f"{path!r} no se puede usar dentro de un batch."}
+        path = API_PREFIX + relative
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return 404, {"detail": f"No existe la ruta {path!r}."}
+        if not hasattr(match.func, "cls"):  # solo vistas de DRF
+            return 400, {"detail": f"{path!r} no se puede usar dentro de un batch."}
+
+        query_string = "&".join(filter(None, [raw_query, urlencode(query, doseq=True)]))
+        subrequest = self._subrequest(request, op["method"], path, query_string, body)
+        response = match.func(subrequest, *match.args, **match.kwargs)
+        return response.status_code, self._response_body(response)
+
+    @staticmethod
+    def _subrequest(request, method, path, query_string, body) -> WSGIRequest:
+        content = dumps(body) if body is not None else b""
+        environ = {
+            key: value for key, value in request.META.items()
+            if key not in DROPPED_META and not key.startswith(DROPPED_META_PREFIXES)
+        }
+        environ.update({
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": path,
+            "QUERY_STRING": query_string,
+            "HTTP_ACCEPT": "application/json",
+            "wsgi.url_scheme": request.scheme,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(content)),
+            "wsgi.input": io.BytesIO(content),
+        })
+        subrequest = WSGIRequest(environ)
+        # DRF usa este usuario en lugar de volver a validar el JWT
+        subrequest._force_auth_user = request.user
+        subrequest._force_auth_token = request.auth
+        return subrequest
+
+    @staticmethod
+    def _response_body(response):
+        if isinstance(response, Response):
+            return response.data
+        # Respuestas ya serializadas: caché de respuestas, ?stream=true
+        content = b"".join(response.streaming_content) if response.streaming else response.content
+        return orjson.loads(content) if content else None
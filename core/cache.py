@@ -0,0 +1,134 @@
+# core/cache.py
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+class BaseResponseCache(ABC):
+    """
+    Almacén de respuestas ya renderizadas: clave -> (contenido, content_type).
+    Lleva métricas de aciertos/fallos por proceso.
+    """
+
+    def __init__(self, **options):
+        self.lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+
+    def get(self, key):
+        entry = self._get(key)
+        with self.lock:
+            self.metrics["hits" if entry is not None else "misses"] += 1
+        return entry
+
+    def set(self, key, content, content_type):
+        self._set(key, (bytes(content), content_type))
+        with self.lock:
+            self.metrics["sets"] += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self.metrics)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else None
+        stats["backend"] = type(self).__name__
+        return stats
+
+    @abstractmethod
+    def _get(self, key):
+        """(contenido, content_type) guardado en key, o None."""
+
+    @abstractmethod
+    def _set(self, key, entry):
+        """Guarda entry = (contenido, content_type) en key."""
+
+
+class LRUResponseCache(BaseResponseCache):
+    """LRU en memoria del proceso, limitado por tamaño total en bytes."""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, **options):
+        super().__init__(**options)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+
+    def _get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def _set(self, key, entry):
+        size = len(entry[0]) + len(key)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0]) + len(key)
+            self.entries[key] = entry
+            self.size += size
+            while self.size > self.max_bytes:
+                old_key, old_entry = self.entries.popitem(last=False)
+                self.size -= len(old_entry[0]) + len(old_key)
+                self.metrics["evictions"] += 1
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update(entries=len(self.entries), bytes=self.size, max_bytes=self.max_bytes)
+        return stats
+
+
+class DjangoCacheResponseCache(BaseResponseCache):
+    """Backend compartido entre procesos: cualquier caché de Django (Redis, Memcached...)."""
+
+    def __init__(self, alias="default", timeout=300, **options):
+        super().__init__(**options)
+        self.alias = alias
+        self.timeout = timeout
+
+    def _get(self, key):
+        return caches[self.alias].get(key)
+
+    def _set(self, key, entry):
+        caches[self.alias].set(key, entry, self.timeout)
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Instancia única (por proceso) del backend configurado en RESPONSE_CACHE, o None."""
+    global _response_cache
+    config = getattr(settings, "RESPONSE_CACHE", None)
+    if not config:
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                backend = import_string(config["BACKEND"])
+                options = {k.lower(): v for k, v in config.get("OPTIONS", {}).items()}
+                _response_cache = backend(**options)
+    return _response_cache
+
+
+def request_signature(request) -> str:
+    """
+    URL (esquema, host, path y query normalizada, en orden estable) + formato de salida.
+    El esquema y el host cuentan porque los enlaces de paginación (next/previous) son absolutos.
+    """
+    params = request.query_params
+    query = urlencode(sorted((k, v) for k in params for v in params.getlist(k)))
+    return f"{request.scheme}://{request.get_host()}{request.path}?{query}:{request.accepted_renderer.format}"
+
+
+def response_cache_key(scope, request) -> str:
+    """Clave: scope (p. ej. household + generación) + firma de la petición."""
+    return f"resp:{scope}:{hashlib.sha1(request_signature(request).encode()).hexdigest()}"
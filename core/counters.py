@@ -0,0 +1,92 @@
+# core/counters.py
+from collections import Counter
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Count, F
+
+from .generations import ALL_HOUSEHOLDS, bump_generation
+from .models import HouseholdRowCount
+
+
+# Modelos con contador por household. Solo los que no tienen filas globales
+# (household=NULL) y cuyas altas conocemos con exactitud.
+COUNTED_MODELS = ("places.Place", "visits.Visit", "foods.VisitFood")
+
+# Por debajo de este tamaño el COUNT(*) exacto es barato: no merece estimarse
+ESTIMATE_MIN_ROWS = 10000
+
+
+def is_counted(model) -> bool:
+    return model._meta.label in COUNTED_MODELS
+
+
+def bump_household_count(model, household_id, delta) -> None:
+    """Suma delta al contador (model, household) con un UPDATE; crea la fila si falta."""
+    if not household_id or not delta:
+        return
+    label = model._meta.label
+    rows = HouseholdRowCount.objects.filter(household_id=household_id, model=label)
+    if rows.update(count=F("count") + delta):
+        return
+    HouseholdRowCount.objects.bulk_create(
+        [HouseholdRowCount(household_id=household_id, model=label, count=0)],
+        ignore_conflicts=True,
+    )
+    rows.update(count=F("count") + delta)
+
+
+def bump_household_counts(objs) -> None:
+    """Tras un bulk_create (que no lanza señales): un UPDATE por (modelo, household)."""
+    for (model, household_id), delta in Counter((type(o), o.household_id) for o in objs).items():
+        bump_household_count(model, household_id, delta)
+
+
+def household_count(model, household_id):
+    """Total mantenido de filas del household, o None si no hay contador para el modelo."""
+    if not is_counted(model):
+        return None
+    rows = HouseholdRowCount.objects.filter(household_id=household_id, model=model._meta.label)
+    return rows.values_list("count", flat=True).first() or 0
+
+
+def estimated_table_count(model):
+    """
+    Estimación del nº de filas de la tabla entera (pg_class.reltuples, la que
+    mantiene ANALYZE/autovacuum). None si no es PostgreSQL, si la tabla no se ha
+    analizado nunca o si es tan pequeña que contar de verdad es barato.
+    """
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    if not row or row[0] < ESTIMATE_MIN_ROWS:
+        return None
+    return row[0]
+
+
+def rebuild_household_counts(household_id=None) -> int:
+    """Recalcula los contadores con un COUNT agrupado por modelo. Devuelve las filas escritas."""
+    written = 0
+    with transaction.atomic():
+        existing = HouseholdRowCount.objects.all()
+        if household_id:
+            existing = existing.filter(household_id=household_id)
+        existing.delete()
+        for label in COUNTED_MODELS:
+            qs = apps.get_model(label).objects.all()
+            if household_id:
+                qs = qs.filter(household_id=household_id)
+            objs = [
+                HouseholdRowCount(household_id=row["household_id"], model=label, count=row["n"])
+                for row in qs.values("household_id").annotate(n=Count("id")).order_by()
+            ]
+            HouseholdRowCount.objects.bulk_create(objs)
+            written += len(objs)
+        # Los "count" de los listados cacheados salen de aquí
+        bump_generation(household_id or ALL_HOUSEHOLDS)
+    return written
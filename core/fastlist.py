@@ -0,0 +1,233 @@
+# core/fastlist.py
+#
+# Serialización rápida de listados de solo lectura: filas de values_list() y un
+# conversor precompilado por campo que reproduce el to_representation de DRF
+# (mismo JSON byte a byte), sin instancias de modelo ni objetos Field por fila.
+#
+# Solo se usa si todos los campos del serializer son "simples" (columnas del modelo
+# con los tipos de CONVERTERS, o PKs de relaciones); si no, compile_fast_list
+# devuelve None y el viewset sigue por el camino normal.
+import datetime
+import decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import fields as drf_fields, relations, serializers
+from rest_framework.settings import api_settings
+
+
+def _char(field):
+    return str
+
+
+def _integer(field):
+    return int
+
+
+def _boolean(field):
+    return bool
+
+
+def _uuid(field):
+    if field.uuid_format != "hex_verbose":
+        return None
+    return str
+
+
+def _choice(field):
+    choices = dict(field.choice_strings_to_values)
+
+    def convert(value):
+        if value == "":
+            return value
+        return choices.get(str(value), value)
+    return convert
+
+
+def _decimal(field):
+    coerce_to_string = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.normalize_output:
+        return None
+    if field.decimal_places is None:
+        return lambda value: f"{value:f}"
+
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return f"{value.quantize(exponent, rounding=rounding, context=context):f}"
+    return convert
+
+
+def _date(field):
+    output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != drf_fields.ISO_8601:
+        return None
+
+    def convert(value):
+        return value.isoformat() if value else None
+    return convert
+
+
+def _datetime(field, tz):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != drf_fields.ISO_8601 or hasattr(field, "timezone"):
+        return None
+
+    def convert(value):
+        if not value:
+            return None
+        if tz is not None:
+            value = value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+        elif timezone.is_aware(value):
+            value = timezone.make_naive(value, datetime.timezone.utc)
+        value = value.isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+    return convert
+
+
+def _pk(field):
+    if field.pk_field is not None:
+        return None
+    return lambda value: value  # DRF devuelve el PK tal cual (UUID)
+
+
+# to_representation de DRF -> constructor del conversor equivalente
+CONVERTERS = {
+    drf_fields.CharField.to_representation: _char,
+    drf_fields.IntegerField.to_representation: _integer,
+    drf_fields.BooleanField.to_representation: _boolean,
+    drf_fields.UUIDField.to_representation: _uuid,
+    drf_fields.ChoiceField.to_representation: _choice,
+    drf_fields.DecimalField.to_representation: _decimal,
+    drf_fields.DateField.to_representation: _date,
+    relations.PrimaryKeyRelatedField.to_representation: _pk,
+}
+
+
+class FastListPlan:
+    """Columnas a pedir con values_list() y cómo convertir cada fila en el dict de salida."""
+
+    def __init__(self, model, columns, outputs, many_related):
+        self.model = model
+        self.columns = columns              # values_list(*columns); la 0 es siempre el PK
+        self.outputs = outputs              # [(nombre, índice de columna, conversor)]
+        self.many_related = many_related    # [(nombre, campo M2M)]
+
+    def values(self, queryset):
+        return queryset.prefetch_related(None).values_list(*self.columns)
+
+    def serialize(self, rows) -> list:
+        rows = list(rows)
+        related = {name: self._related_ids(field, rows) for name, field in self.many_related}
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, index, convert in self.outputs:
+                if index is None:
+                    item[name] = related[name].get(row[0], [])
+                else:
+                    value = row[index]
+                    item[name] = None if value is None else convert(value)
+            data.append(item)
+        return data
+
+    @staticmethod
+    def _related_ids(field, rows):
+        """
+        PKs relacionados de toda la página en una consulta. Sin ordenación por defecto
+        en el modelo relacionado basta la tabla intermedia (sin JOIN), ordenada por el
+        PK relacionado; si la tiene, se consulta el modelo para respetarla.
+        """
+        if not rows:
+            return {}
+        owner_ids = [row[0] for row in rows]
+        if field.related_model._meta.ordering:
+            query_name = field.related_query_name()
+            pairs = field.related_model._default_manager.filter(
+                **{f"{query_name}__in": owner_ids}
+            ).values_list(query_name, "pk")
+        else:
+            through = field.remote_field.through
+            source = through._meta.get_field(field.m2m_field_name()).attname
+            target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+            pairs = through._default_manager.filter(
+                **{f"{source}__in": owner_ids}
+            ).order_by(target).values_list(source, target)
+
+        by_owner = {}
+        for owner_id, related_id in pairs:
+            by_owner.setdefault(owner_id, []).append(related_id)
+        return by_owner
+
+
+def _converter_for(field, tz):
+    to_representation = type(field).to_representation
+    if to_representation is drf_fields.DateTimeField.to_representation:
+        return _datetime(field, tz)
+    build = CONVERTERS.get(to_representation)
+    return build(field) if build else None
+
+
+@lru_cache(maxsize=128)
+def _compile(serializer_class, fields, tz):
+    if serializer_class.to_representation is not serializers.Serializer.to_representation:
+        return None
+    model = serializer_class.Meta.model
+    pk_name = model._meta.pk.attname
+    columns = [pk_name]
+    outputs, many_related = [], []
+
+    for field in serializer_class()._readable_fields:
+        if fields is not None and field.field_name not in fields:
+            continue
+        if "." in field.source or field.source == "*":
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+
+        if isinstance(field, relations.ManyRelatedField):
+            child = field.child_relation
+            if not model_field.many_to_many or _converter_for(child, tz) is None:
+                return None
+            if type(field).to_representation is not relations.ManyRelatedField.to_representation:
+                return None
+            outputs.append((field.field_name, None, None))
+            many_related.append((field.field_name, model_field))
+            continue
+
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        convert = _converter_for(field, tz)
+        if convert is None:
+            return None
+        if model_field.attname == pk_name:
+            index = 0
+        else:
+            columns.append(model_field.attname)
+            index = len(columns) - 1
+        outputs.append((field.field_name, index, convert))
+
+    return FastListPlan(model, columns, outputs, many_related)
+
+
+def compile_fast_list(serializer_class, fields=None):
+    """
+    FastListPlan para serializer_class (limitado a fields si se indica), o None si
+    algún campo necesita el camino normal de DRF. Se cachea por serializer, campos
+    y zona horaria activa.
+    """
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    return _compile(serializer_class, tuple(fields) if fields is not None else None, tz)
@@ -0,0 +1,119 @@
+# core/generations.py
+from functools import partial
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+
+from accounts.models import Household
+from .models import SyncEntry
+from .transactions import transaction_local
+
+
+# Modelos cuyos cambios invalidan las respuestas cacheadas del household
+GENERATION_MODELS = (
+    "categorization.PlaceType",
+    "categorization.Tag",
+    "places.Place",
+    "places.PlaceTag",
+    "visits.Visit",
+    "foods.Food",
+    "foods.VisitFood",
+)
+
+# FKs con on_delete=SET_NULL desde modelos de GENERATION_MODELS: (modelo, campo). Django
+# las pone a NULL con un UPDATE, sin señales, así que los hijos se apuntan al borrar el padre
+SET_NULL_RELATIONS = (
+    ("places.Place", "area"),
+)
+
+ALL_HOUSEHOLDS = object()
+
+
+def household_of(instance):
+    """
+    Household afectado por un cambio en instance. ALL_HOUSEHOLDS para filas
+    globales (household=NULL), que se ven desde todos; None si no se sabe.
+    """
+    if hasattr(instance, "household_id"):
+        return instance.household_id or ALL_HOUSEHOLDS
+    try:
+        return instance.place.household_id  # PlaceTag
+    except (AttributeError, ObjectDoesNotExist):
+        # El Place ya no existe (borrado en cascada): su propio borrado ya cuenta
+        return None
+
+
+def get_generation_state(household_id):
+    """(generation, changed_at) del household en una consulta."""
+    row = Household.objects.filter(pk=household_id).values_list("generation", "changed_at").first()
+    return row or (0, None)
+
+
+def bump_generation(*household_ids) -> None:
+    """Incrementa la generación de los households indicados (sin apuntar objetos)."""
+    _queue({h: {} for h in household_ids if h is not None})
+
+
+def record_changes(household_id, changes) -> None:
+    """
+    Apunta objetos cambiados de un household para la sincronización:
+    changes = [(label_modelo, object_id, deleted), ...]. Incrementa su generación.
+    """
+    if household_id is None or household_id is ALL_HOUSEHOLDS:
+        return bump_generation(household_id)
+    _queue({household_id: {(label, object_id): deleted for label, object_id, deleted in changes}})
+
+
+def record_objects(objs) -> None:
+    """record_changes para objetos guardados sin señales (bulk_create), agrupados por household."""
+    by_household = {}
+    for obj in objs:
+        by_household.setdefault(obj.household_id, []).append((obj._meta.label, obj.pk, False))
+    for household_id, changes in by_household.items():
+        record_changes(household_id, changes)
+
+
+def _queue(changes) -> None:
+    """
+    Incrementa la generación de cada household y apunta sus objetos en SyncEntry
+    dentro de la transacción de los datos (o en una propia si no hay ninguna): se
+    confirman juntos o no se confirma nada. El bloqueo de la fila del household se
+    toma en el primer cambio y dura hasta el commit, así que ordena a los escritores
+    concurrentes: las generaciones siguen el orden de commit y sirven como token de
+    sincronización. En cada transacción la generación sube una sola vez por household.
+    """
+    if not changes:
+        return
+    with transaction.atomic(savepoint=False):
+        if ALL_HOUSEHOLDS in changes:
+            transaction_local(("generation", ALL_HOUSEHOLDS), _increment_all)
+        generations = {
+            h: transaction_local(("generation", h), partial(_increment, h))
+            for h in changes if h is not ALL_HOUSEHOLDS
+        }
+
+        entries = [
+            SyncEntry(household_id=h, model=label, object_id=object_id, seq=seq, deleted=deleted)
+            for h, seq in generations.items() if seq is not None
+            for (label, object_id), deleted in changes[h].items()
+        ]
+        if entries:
+            SyncEntry.objects.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=["model", "object_id"],
+                update_fields=["household", "seq", "deleted", "changed_at"],
+            )
+
+
+def _increment(household_id):
+    """Sube la generación del household (bloquea su fila) y la devuelve; None si no existe."""
+    households = Household.objects.filter(pk=household_id)
+    households.update(generation=F("generation") + 1, changed_at=Now())
+    return households.values_list("generation", flat=True).first()
+
+
+def _increment_all() -> None:
+    Household.objects.update(generation=F("generation") + 1, changed_at=Now())
@@ -1,4 +1,11 @@
 from django.http import JsonResponse
 
+from .cache import get_response_cache
+
+
 def healthcheck(request):
-    return JsonResponse({"status": "ok"})
+    cache = get_response_cache()
+    return JsonResponse({
+        "status": "ok",
+        "response_cache": cache.stats() if cache is not None else None,
+    })
@@ -0,0 +1,77 @@
+# core/management/commands/benchmark_json_renderer.py
+import time
+
+import orjson
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import Household
+from core.renderers import STREAM_CHUNK_SIZE, FastJSONRenderer, stream_json_array
+from places.api import PlaceSerializer
+from places.models import Place
+from visits.api import VisitSerializer
+from visits.models import Visit
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara JSONRenderer de DRF con FastJSONRenderer (y el array en streaming) sobre "
+        "listados reales de Places y Visits: tiempo de render y que el JSON sea el mismo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--household", help="Household (UUID). Por defecto, el que más visitas tiene.")
+        parser.add_argument("--sizes", default="20,200,2000", help="Número de filas, separados por comas.")
+        parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por medida (se queda la mejor).")
+
+    def handle(self, *args, **opts):
+        household_id = opts["household"] or (
+            Household.objects.annotate(n=Count("visits")).order_by("-n").values_list("id", flat=True).first()
+        )
+        if household_id is None:
+            raise CommandError("No hay households.")
+        sizes = [int(s) for s in opts["sizes"].split(",") if s.strip()]
+        drf, fast = JSONRenderer(), FastJSONRenderer()
+
+        payloads = (
+            ("Place", PlaceSerializer, Place.objects.filter(household_id=household_id).prefetch_related("tags")),
+            ("Visit", VisitSerializer, Visit.objects.filter(household_id=household_id)),
+        )
+        for name, serializer_class, qs in payloads:
+            for size in sizes:
+                results = serializer_class(list(qs[:size]), many=True).data
+                page = {"count": len(results), "count_exact": True, "next": None, "previous": None, "results": results}
+
+                drf_body, drf_time = self._measure(lambda: drf.render(page), opts["repeat"])
+                fast_body, fast_time = self._measure(lambda: fast.render(page), opts["repeat"])
+                stream_body, stream_time = self._measure(
+                    lambda: b"".join(stream_json_array(
+                        results[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(results), STREAM_CHUNK_SIZE)
+                    )),
+                    opts["repeat"],
+                )
+                # Byte a byte salvo los floats con exponente (1e16 / 1e+16), que se comparan por valor
+                if not _same_json(fast_body, drf_body) or not _same_json(stream_body, drf.render(results)):
+                    raise CommandError(f"{name} ({size} filas): el JSON no coincide.")
+
+                self.stdout.write(
+                    f"{name:<6} {size:>5} ({len(results):>5} filas, {len(drf_body) / 1024:8.1f} KiB)  "
+                    f"drf {drf_time * 1000:8.2f} ms  rápido {fast_time * 1000:7.2f} ms  "
+                    f"streaming {stream_time * 1000:7.2f} ms  x{drf_time / fast_time if fast_time else 0:.1f}"
+                )
+
+    @staticmethod
+    def _measure(fn, repeat):
+        best, body = None, None
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            body = fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return body, best
+
+
+def _same_json(a, b) -> bool:
+    return a == b or orjson.loads(a) == orjson.loads(b)
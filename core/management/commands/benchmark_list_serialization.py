@@ -0,0 +1,75 @@
+# core/management/commands/benchmark_list_serialization.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import Household
+from core.fastlist import compile_fast_list
+from foods.api import VisitFoodViewSet
+from places.api import PlaceViewSet
+from visits.api import VisitViewSet
+
+
+VIEWSETS = (PlaceViewSet, VisitViewSet, VisitFoodViewSet)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la serialización normal de los listados (instancias + serializer) con la "
+        "rápida desde values_list(): tiempo por página y que el JSON sea idéntico."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--household", help="Household (UUID). Por defecto, el que más visitas tiene.")
+        parser.add_argument("--sizes", default="20,200,2000", help="Tamaños de página, separados por comas.")
+        parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por medida (se queda la mejor).")
+
+    def handle(self, *args, **opts):
+        household_id = opts["household"] or (
+            Household.objects.annotate(n=Count("visits")).order_by("-n").values_list("id", flat=True).first()
+        )
+        if household_id is None:
+            raise CommandError("No hay households.")
+        sizes = [int(s) for s in opts["sizes"].split(",") if s.strip()]
+        renderer = JSONRenderer()
+
+        for viewset in VIEWSETS:
+            plan = compile_fast_list(viewset.serializer_class)
+            if plan is None:
+                self.stdout.write(f"{viewset.__name__}: el serializer no admite el modo rápido.")
+                continue
+            qs = viewset.queryset.filter(household_id=household_id)
+            for lookups in viewset.sparse_prefetch.values():
+                qs = qs.prefetch_related(*lookups)
+
+            for size in sizes:
+                def normal():
+                    objs = list(qs[:size])
+                    return renderer.render(viewset.serializer_class(objs, many=True).data)
+
+                def fast():
+                    return renderer.render(plan.serialize(plan.values(qs)[:size]))
+
+                normal_body, normal_time = self._measure(normal, opts["repeat"])
+                fast_body, fast_time = self._measure(fast, opts["repeat"])
+                if normal_body != fast_body:
+                    raise CommandError(f"{viewset.__name__} ({size} filas): el JSON no coincide.")
+
+                rows = len(plan.values(qs)[:size])
+                self.stdout.write(
+                    f"{viewset.__name__:<18} {size:>5} ({rows:>5} filas)  "
+                    f"normal {normal_time * 1000:8.2f} ms  rápido {fast_time * 1000:8.2f} ms  "
+                    f"x{normal_time / fast_time if fast_time else 0:.1f}"
+                )
+
+    @staticmethod
+    def _measure(fn, repeat):
+        best, body = None, None
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            body = fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return body, best
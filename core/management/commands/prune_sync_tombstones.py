@@ -0,0 +1,41 @@
+# core/management/commands/prune_sync_tombstones.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from accounts.models import Household
+from core.models import SyncEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las lápidas (SyncEntry con deleted=True) más antiguas que --days. Los "
+        "clientes con un token anterior a lo purgado reciben una sincronización completa."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=90, help="Antigüedad mínima en días (default 90).")
+        parser.add_argument("--household", help="Limitar a un household (UUID).")
+
+    def handle(self, *args, **opts):
+        if opts["days"] < 0:
+            raise CommandError("--days debe ser >= 0")
+        tombstones = SyncEntry.objects.filter(
+            deleted=True, changed_at__lt=timezone.now() - timedelta(days=opts["days"])
+        )
+        if opts["household"]:
+            tombstones = tombstones.filter(household_id=opts["household"])
+
+        with transaction.atomic():
+            # Primero el suelo de cada household (la mayor seq purgada), luego el borrado
+            floors = tombstones.values("household_id").annotate(seq=Max("seq")).order_by()
+            for row in floors:
+                Household.objects.filter(pk=row["household_id"], sync_floor__lt=row["seq"]).update(
+                    sync_floor=row["seq"]
+                )
+            deleted, _ = tombstones.delete()
+
+        self.stdout.write(self.style.SUCCESS(f"{deleted} lápidas borradas."))
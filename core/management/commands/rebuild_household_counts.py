@@ -0,0 +1,15 @@
+# core/management/commands/rebuild_household_counts.py
+from django.core.management.base import BaseCommand
+
+from core.counters import rebuild_household_counts
+
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores HouseholdRowCount (Places, Visits y VisitFoods por household)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--household", help="Limitar a un household (UUID).")
+
+    def handle(self, *args, **opts):
+        written = rebuild_household_counts(opts["household"])
+        self.stdout.write(self.style.SUCCESS(f"{written} contadores recalculados."))
@@ -0,0 +1,15 @@
+# core/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_search_index, uses_ngram_table
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los trigramas de búsqueda (SearchNgram). En PostgreSQL no hace falta: usa índices GIN."
+
+    def handle(self, *args, **opts):
+        if not uses_ngram_table():
+            self.stdout.write("PostgreSQL: la búsqueda usa los índices pg_trgm, no hay nada que reconstruir.")
+            return
+        total = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"{total} objetos indexados."))
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.25 on 2026-10-18 16:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HouseholdRowCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=100)),
+                ("count", models.BigIntegerField(default=0)),
+                (
+                    "household",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="row_counts",
+                        to="accounts.household",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "household_row_count",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="householdrowcount",
+            constraint=models.UniqueConstraint(
+                fields=("household", "model"), name="uniq_household_row_count"
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+COUNTED_MODELS = (("places", "Place"), ("visits", "Visit"), ("foods", "VisitFood"))
+
+
+def backfill_household_row_count(apps, schema_editor):
+    """Inicializa los contadores con un COUNT agrupado por household y modelo."""
+    HouseholdRowCount = apps.get_model("core", "HouseholdRowCount")
+    for app_label, model_name in COUNTED_MODELS:
+        model = apps.get_model(app_label, model_name)
+        HouseholdRowCount.objects.bulk_create(
+            [
+                HouseholdRowCount(
+                    household_id=row["household_id"],
+                    model=f"{app_label}.{model_name}",
+                    count=row["n"],
+                )
+                for row in model.objects.values("household_id")
+                .annotate(n=Count("id"))
+                .order_by()
+            ]
+        )
+
+
+def clear_household_row_count(apps, schema_editor):
+    apps.get_model("core", "HouseholdRowCount").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_household_row_count"),
+        ("places", "0002_place_metric_sums"),
+        ("visits", "0007_visit_household_not_null"),
+        ("foods", "0007_visitfood_household_not_null"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_household_row_count, clear_household_row_count),
+    ]
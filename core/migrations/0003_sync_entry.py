@@ -0,0 +1,56 @@
+# Generated by Django 4.2.25 on 2026-10-18 16:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_household_changed_at"),
+        ("core", "0002_backfill_household_row_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=100)),
+                ("object_id", models.UUIDField()),
+                ("seq", models.BigIntegerField()),
+                ("deleted", models.BooleanField(default=False)),
+                ("changed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "household",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_entries",
+                        to="accounts.household",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "sync_entry",
+                "indexes": [
+                    models.Index(
+                        fields=["household", "seq"], name="idx_sync_entry_hh_seq"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="syncentry",
+            constraint=models.UniqueConstraint(
+                fields=("model", "object_id"), name="uniq_sync_entry_object"
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.25 on 2026-10-18 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_sync_entry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchNgram",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=100)),
+                ("field", models.CharField(max_length=100)),
+                ("object_id", models.UUIDField()),
+                ("gram", models.CharField(max_length=3)),
+            ],
+            options={
+                "db_table": "search_ngram",
+                "indexes": [
+                    models.Index(
+                        fields=["model", "object_id"], name="idx_search_ngram_object"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="searchngram",
+            constraint=models.UniqueConstraint(
+                fields=("model", "field", "gram", "object_id"), name="uniq_search_ngram"
+            ),
+        ),
+    ]
@@ -0,0 +1,92 @@
+import unicodedata
+
+from django.db import migrations
+
+
+def normalize(text):
+    # Copia de core.search.normalize / ngrams en el momento de esta migración
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def ngrams(text):
+    text = normalize(text or "")
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+# (tabla, columna, índice) de los campos de búsqueda (core.search.SEARCH_INDEX)
+SEARCH_COLUMNS = (
+    ("places_place", "name", "idx_place_name_trgm"),
+    ("foods_food", "name", "idx_food_name_trgm"),
+    ("visits_visit", "comment", "idx_visit_comment_trgm"),
+    ("foods_visitfood", "comment", "idx_visitfood_comment_trgm"),
+)
+
+SEARCH_MODELS = (
+    ("places", "Place", "name"),
+    ("foods", "Food", "name"),
+    ("visits", "Visit", "comment"),
+    ("foods", "VisitFood", "comment"),
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    """
+    PostgreSQL: pg_trgm + unaccent, search_normalize() (inmutable, para poder indexarla)
+    e índices GIN de trigramas sobre search_normalize(columna).
+    Otros motores: trigramas precalculados en SearchNgram.
+    """
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        schema_editor.execute(
+            "CREATE OR REPLACE FUNCTION search_normalize(text) RETURNS text AS "
+            "$$ SELECT public.unaccent('public.unaccent'::regdictionary, lower($1)) $$ "
+            "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+        )
+        for table, column, index in SEARCH_COLUMNS:
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {index} ON {table} "
+                f"USING gin (search_normalize({column}) gin_trgm_ops)"
+            )
+        return
+
+    SearchNgram = apps.get_model("core", "SearchNgram")
+    for app_label, model_name, field in SEARCH_MODELS:
+        model = apps.get_model(app_label, model_name)
+        SearchNgram.objects.bulk_create(
+            [
+                SearchNgram(
+                    model=f"{app_label}.{model_name}",
+                    field=field,
+                    object_id=pk,
+                    gram=gram,
+                )
+                for pk, text in model.objects.values_list("id", field).iterator()
+                for gram in ngrams(text)
+            ],
+            batch_size=2000,
+            ignore_conflicts=True,
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for _, _, index in SEARCH_COLUMNS:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {index}")
+        schema_editor.execute("DROP FUNCTION IF EXISTS search_normalize(text)")
+        return
+    apps.get_model("core", "SearchNgram").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0004_search_ngram"),
+        ("places", "0002_place_metric_sums"),
+        ("visits", "0008_visit_updated_at"),
+        ("foods", "0008_visitfood_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -1,3 +1,74 @@
+# core/models.py
 from django.db import models
 
-# Create your models here.
+from accounts.models import Household
+
+
+class HouseholdRowCount(models.Model):
+    """
+    Nº de filas de un modelo por household, mantenido por señales (core/signals.py)
+    y por los caminos de bulk_create. La paginación lo usa en vez de COUNT(*)
+    cuando el listado no lleva filtros. Se reconstruye con rebuild_household_counts.
+    """
+    household = models.ForeignKey(Household, on_delete=models.CASCADE, related_name="row_counts")
+    model = models.CharField(max_length=100)  # label del modelo, p. ej. "visits.Visit"
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "household_row_count"
+        constraints = [
+            models.UniqueConstraint(fields=["household", "model"], name="uniq_household_row_count"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} · {self.household_id}: {self.count}"
+
+
+class SyncEntry(models.Model):
+    """
+    Último cambio de cada fila sincronizable (ver core/sync.py): una fila por objeto,
+    actualizada en cada cambio con seq = generación del household en ese momento.
+    Las entradas con deleted=True son las lápidas (tombstones) de los borrados.
+    """
+    household = models.ForeignKey(Household, on_delete=models.CASCADE, related_name="sync_entries")
+    model = models.CharField(max_length=100)  # label del modelo, p. ej. "visits.Visit"
+    object_id = models.UUIDField()
+    seq = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "sync_entry"
+        constraints = [
+            models.UniqueConstraint(fields=["model", "object_id"], name="uniq_sync_entry_object"),
+        ]
+        indexes = [
+            models.Index(fields=["household", "seq"], name="idx_sync_entry_hh_seq"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} @{self.seq}{' (borrado)' if self.deleted else ''}"
+
+
+class SearchNgram(models.Model):
+    """
+    Trigramas del texto normalizado (minúsculas, sin acentos) de los campos de
+    búsqueda (core/search.py). Solo se usa fuera de PostgreSQL, donde ?search= se
+    resuelve con índices GIN pg_trgm; aquí preselecciona los candidatos por índice.
+    """
+    model = models.CharField(max_length=100)  # label del modelo, p. ej. "places.Place"
+    field = models.CharField(max_length=100)
+    object_id = models.UUIDField()
+    gram = models.CharField(max_length=3)
+
+    class Meta:
+        db_table = "search_ngram"
+        constraints = [
+            models.UniqueConstraint(fields=["model", "field", "gram", "object_id"], name="uniq_search_ngram"),
+        ]
+        indexes = [
+            models.Index(fields=["model", "object_id"], name="idx_search_ngram_object"),
+        ]
+
+    def __str__(self):
+        return f"{self.model}.{self.field} {self.object_id}: {self.gram!r}"
@@ -0,0 +1,261 @@
+# core/pagination.py
+import base64
+import json
+
+from functools import partial
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Page, Paginator as DjangoPaginator
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .counters import estimated_table_count, household_count
+
+
+def encode_cursor(values) -> str:
+    """Codifica los valores de la última fila de una página como token opaco."""
+    raw = json.dumps([None if v is None else str(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(token: str, fields) -> list:
+    """
+    Decodifica un token de encode_cursor usando los campos del modelo para
+    reconvertir cada valor (fecha, decimal, UUID...). Lanza ValueError si no es válido.
+    """
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    except Exception as exc:
+        raise ValueError("cursor inválido") from exc
+    if not isinstance(raw, list) or len(raw) != len(fields):
+        raise ValueError("cursor inválido")
+    try:
+        return [None if v is None else f.to_python(v) for f, v in zip(fields, raw)]
+    except Exception as exc:
+        raise ValueError("cursor inválido") from exc
+
+
+def keyset_ordering(keys) -> list:
+    """
+    Expresiones de order_by para claves (path, descending, nullable).
+    Los nulos van siempre al final, que es lo que asume keyset_after.
+    """
+    ordering = []
+    for path, descending, nullable in keys:
+        expr = F(path).desc if descending else F(path).asc
+        ordering.append(expr(nulls_last=True) if nullable else expr())
+    return ordering
+
+
+def keyset_after(keys, values) -> Q:
+    """
+    Condición "estrictamente después de la fila con estos valores" para un orden
+    compuesto. La última clave debe ser única (típicamente el PK) para desempatar.
+        keys:   [(path, descending, nullable), ...]
+        values: valores de la última fila servida, en el mismo orden.
+    """
+    (path, descending, nullable), rest = keys[0], keys[1:]
+    value, rest_values = values[0], values[1:]
+
+    if value is None:
+        # Con nulos al final, después de un nulo solo quedan nulos
+        strict = Q(pk__in=[])
+        equal = Q(**{f"{path}__isnull": True})
+    else:
+        strict = Q(**{f"{path}__{'lt' if descending else 'gt'}": value})
+        if nullable:
+            strict |= Q(**{f"{path}__isnull": True})
+        equal = Q(**{path: value})
+
+    if not rest:
+        return strict
+    return strict | (equal & keyset_after(rest, rest_values))
+
+
+def _field_for_path(model, path):
+    """Campo de modelo al final de un path con "__" (p. ej. "visit__date")."""
+    field = None
+    for part in path.split("__"):
+        field = model._meta.pk if part == "pk" else model._meta.get_field(part)
+        if field.is_relation and field.related_model is not None:
+            model = field.related_model
+    return field
+
+
+def _value_for_path(obj, path):
+    *relations, last = path.split("__")
+    for part in relations:
+        obj = getattr(obj, part)
+    if last == "pk":
+        return obj.pk
+    return getattr(obj, obj._meta.get_field(last).attname)
+
+
+class _KnownCountPaginator(DjangoPaginator):
+    """Paginator de Django con el total ya conocido: no lanza COUNT(*)."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count  # sustituye a la cached_property
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """
+    Paginación por número de página (por defecto) o keyset a petición.
+
+    - ?page=N: páginas con "count" y "count_exact". El total sale, de más barato a
+      más caro, de:
+        · el contador mantenido del household (HouseholdRowCount) si el listado no
+          lleva filtros → exacto;
+        · pg_class.reltuples si el queryset es la tabla entera (sin WHERE), es decir
+          en los listados sin household (Areas) → estimado;
+        · COUNT(*) en el resto de casos → exacto.
+      Con ?count=false no se cuenta nada ("count": null); "next" se sabe pidiendo
+      una fila de más.
+    - ?cursor= (vacío para la primera página, luego el token de "next"): keyset
+      sobre la ordenación efectiva del queryset (la del viewset o la de ?ordering=),
+      con el PK como desempate. Sin COUNT ni OFFSET: el coste no crece con la
+      profundidad. Respuesta: {"next": url|null, "results": [...]}.
+    """
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    # Parámetros que no cambian el total del listado
+    count_neutral_params = {"page", "page_size", "cursor", "count", "ordering", "format", "fields", "omit", "stream"}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.cursor_query_param in request.query_params:
+            return self._paginate_keyset(queryset, request)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.count_exact = True
+        if request.query_params.get(self.count_query_param, "").lower() in ("false", "0", "no"):
+            self.count_exact = False
+            self.count = None
+            return self._paginate_open_ended(queryset, request, page_size)
+
+        maintained = self._maintained_count(queryset, request, view)
+        if maintained is not None:
+            # Instancia por petición: el paginator de Django recibe el total ya hecho
+            self.django_paginator_class = partial(_KnownCountPaginator, count=maintained)
+        elif not queryset.query.where:
+            # Solo en vistas sin household: las de HouseholdScopedViewSet siempre filtran
+            estimate = estimated_table_count(queryset.model)
+            if estimate is not None:
+                self.count_exact = False
+                self.count = estimate
+                return self._paginate_open_ended(queryset, request, page_size)
+
+        page = super().paginate_queryset(queryset, request, view)
+        self.count = self.page.paginator.count
+        return page
+
+    def _maintained_count(self, queryset, request, view):
+        """Total del contador del household, solo para listados sin filtros."""
+        if view is None or getattr(view, "include_global_readonly", False):
+            return None
+        if set(request.query_params) - self.count_neutral_params - {self.page_query_param}:
+            return None
+        profile = getattr(request.user, "profile", None)
+        if profile is None:
+            return None
+        return household_count(queryset.model, profile.household_id)
+
+    def _paginate_open_ended(self, queryset, request, page_size):
+        """Página N sin conocer el total: OFFSET + una fila de más para saber si hay "next"."""
+        self.request = request
+        raw = request.query_params.get(self.page_query_param) or 1
+        try:
+            number = int(raw)
+            if number < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_page_message.format(page_number=raw, message="Número de página inválido."))
+
+        offset = (number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and number > 1:
+            raise NotFound(self.invalid_page_message.format(page_number=raw, message="Página vacía."))
+
+        # Total "visto" (filas hasta esta página + 1 si hay más): basta para navegar
+        paginator = _KnownCountPaginator(queryset, page_size, count=offset + len(rows))
+        self.page = Page(rows[:page_size], number, paginator)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+    def _paginate_keyset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        self.keyset = self._keyset_keys(queryset)
+        fields = [_field_for_path(queryset.model, path) for path, _, _ in self.keyset]
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            try:
+                after = decode_cursor(token, fields)
+            except ValueError:
+                raise NotFound("Cursor inválido.")
+            queryset = queryset.filter(keyset_after(self.keyset, after))
+
+        rows = list(queryset.order_by(*keyset_ordering(self.keyset))[:page_size + 1])
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_cursor = encode_cursor([_value_for_path(rows[-1], path) for path, _, _ in self.keyset])
+        return rows
+
+    def _keyset_keys(self, queryset):
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering or [])
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str) or item == "?":
+                continue  # expresiones/aleatorio: no se pueden usar como cursor
+            path = item.lstrip("-")
+            try:
+                field = _field_for_path(queryset.model, path)
+            except FieldDoesNotExist:
+                continue  # anotaciones
+            keys.append((path, item.startswith("-"), field.null))
+            if field.primary_key:
+                return keys
+        keys.append(("pk", True, False))
+        return keys
+
+    def get_next_link(self):
+        if self.keyset is None:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return Response({"next": self.get_next_link(), "results": data})
+        return Response({
+            "count": self.count,
+            "count_exact": self.count_exact,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        page_schema = super().get_paginated_response_schema(schema)
+        page_schema["properties"]["count"]["nullable"] = True
+        page_schema["properties"]["count_exact"] = {"type": "boolean", "example": True}
+        page_schema["description"] = (
+            "Con ?count=false no se calcula 'count' (null). "
+            "Con ?cursor= la respuesta es keyset: solo 'next' y 'results' (sin 'count' ni 'previous')."
+        )
+        return page_schema
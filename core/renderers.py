@@ -0,0 +1,89 @@
+# core/renderers.py
+import math
+
+import orjson
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+# Mismo tratamiento que DRF para lo que orjson no serializa igual (Decimal, fechas
+# con milisegundos y "Z", lazy strings, querysets...): se delega en su encoder.
+_drf_default = JSONEncoder().default
+
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+STREAM_CHUNK_SIZE = 500
+
+
+def dumps(data) -> bytes:
+    """
+    JSON compacto en UTF-8, igual al de JSONRenderer con la configuración por
+    defecto de DRF (COMPACT_JSON, UNICODE_JSON) salvo en los floats con exponente,
+    que orjson escribe sin "+" ni ceros (1e16 frente a 1e+16: mismo valor). Lanza
+    TypeError si hay algún tipo que no sepa serializar y ValueError con NaN o
+    infinito, que orjson convertiría en null (DRF, con STRICT_JSON, también falla).
+    """
+    content = orjson.dumps(data, default=_drf_default, option=_OPTIONS)
+    # Un NaN/inf solo puede haber salido como null: si no hay ninguno, no se recorre
+    if b"null" in content and _has_non_finite(data):
+        raise ValueError("Out of range float values are not JSON compliant")
+    # Como DRF: U+2028/U+2029 escapados, válidos también dentro de <script>
+    if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+        content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    return content
+
+
+def _has_non_finite(data) -> bool:
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer sobre orjson: el JSON de DRF (con la salvedad de dumps), bastante más
+    rápido en listados grandes.
+    Con indentación (Accept: application/json; indent=N), ajustes de JSON distintos
+    de los de por defecto o tipos raros usa el renderer de DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if (
+            self.get_indent(accepted_media_type, renderer_context) is None
+            and self.compact and not self.ensure_ascii and self.strict
+        ):
+            try:
+                return dumps(data)
+            except (TypeError, ValueError):
+                pass
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+def stream_json_array(chunks):
+    """Genera un array JSON por trozos a partir de un iterable de listas de elementos."""
+    yield b"["
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        body = dumps(chunk)[1:-1]
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+def streaming_json_response(chunks, **kwargs) -> StreamingHttpResponse:
+    """StreamingHttpResponse con un array JSON que se escribe según se generan los trozos."""
+    return StreamingHttpResponse(stream_json_array(chunks), content_type="application/json", **kwargs)
@@ -0,0 +1,181 @@
+# core/search.py
+import operator
+import unicodedata
+from functools import reduce
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import Count, F, FloatField, Func, Q, TextField, Value
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import Contains
+from rest_framework.filters import SearchFilter
+
+from .models import SearchNgram
+
+
+# Campos con trigramas precalculados (SearchNgram) fuera de PostgreSQL; en
+# PostgreSQL llevan un índice GIN pg_trgm sobre search_normalize(campo).
+SEARCH_INDEX = {
+    "places.Place": ("name",),
+    "foods.Food": ("name",),
+    "visits.Visit": ("comment",),
+    "foods.VisitFood": ("comment",),
+}
+
+
+def normalize(text):
+    """Minúsculas y sin acentos ("Jamón" -> "jamon"), como search_normalize() en la BD."""
+    if text is None:
+        return None
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def ngrams(text) -> set:
+    """Trigramas (3 caracteres seguidos) del texto normalizado."""
+    text = normalize(text) or ""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _word_trigrams(text) -> set:
+    grams = set()
+    for word in "".join(c if c.isalnum() else " " for c in text.lower()).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """similarity() de pg_trgm: trigramas comunes / trigramas totales, por palabras."""
+    if a is None or b is None:
+        return None
+    left, right = _word_trigrams(a), _word_trigrams(b)
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class SearchNormalize(Func):
+    function = "search_normalize"
+    output_field = TextField()
+
+
+class Similarity(Func):
+    function = "similarity"
+    output_field = FloatField()
+
+
+def uses_ngram_table() -> bool:
+    return connection.vendor != "postgresql"
+
+
+def register_sqlite_functions(sender, connection, **kwargs):
+    """En SQLite, search_normalize() y similarity() son funciones Python de la conexión."""
+    if connection.vendor == "sqlite":
+        connection.connection.create_function("search_normalize", 1, normalize, deterministic=True)
+        connection.connection.create_function("similarity", 2, similarity, deterministic=True)
+
+
+def index_objects(objs) -> None:
+    """(Re)calcula los trigramas de objs (de un mismo modelo). No hace nada en PostgreSQL."""
+    objs = [obj for obj in objs if obj.pk is not None]
+    if not objs or not uses_ngram_table():
+        return
+    label = objs[0]._meta.label
+    fields = SEARCH_INDEX.get(label, ())
+    if not fields:
+        return
+    SearchNgram.objects.filter(model=label, object_id__in=[obj.pk for obj in objs]).delete()
+    SearchNgram.objects.bulk_create(
+        [
+            SearchNgram(model=label, field=field, object_id=obj.pk, gram=gram)
+            for obj in objs
+            for field in fields
+            for gram in ngrams(getattr(obj, field))
+        ],
+        batch_size=2000,
+        ignore_conflicts=True,
+    )
+
+
+def unindex_objects(label, object_ids) -> None:
+    if uses_ngram_table():
+        SearchNgram.objects.filter(model=label, object_id__in=list(object_ids)).delete()
+
+
+def rebuild_search_index(chunk_size=2000) -> int:
+    """Reconstruye SearchNgram entera. Devuelve el nº de objetos indexados."""
+    if not uses_ngram_table():
+        return 0
+    SearchNgram.objects.all().delete()
+    total = 0
+    for label, fields in SEARCH_INDEX.items():
+        qs = apps.get_model(label).objects.only("pk", *fields).order_by("pk")
+        chunk = []
+        for obj in qs.iterator(chunk_size=chunk_size):
+            chunk.append(obj)
+            if len(chunk) >= chunk_size:
+                index_objects(chunk)
+                total += len(chunk)
+                chunk = []
+        index_objects(chunk)
+        total += len(chunk)
+    return total
+
+
+class NormalizedSearchFilter(SearchFilter):
+    """
+    ?search= sin distinguir mayúsculas ni acentos ("jamon" encuentra "Jamón"), con
+    cada término buscado como subcadena de search_normalize(campo):
+    - PostgreSQL: LIKE sobre la expresión, resuelto con los índices GIN pg_trgm.
+    - Otros (SQLite): los trigramas del término preseleccionan candidatos en
+      SearchNgram (por índice) y después se comprueba la subcadena.
+    Sin ?ordering= los resultados van por similitud de trigramas (similarity()),
+    desempatando con la ordenación del viewset.
+
+    Los prefijos de DRF (^ = @ $) siguen usando el SearchFilter original.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        terms = [normalize(t) for t in self.get_search_terms(request)]
+        if not search_fields or not terms:
+            return queryset
+        if any(field[0] in self.lookup_prefixes for field in search_fields):
+            return super().filter_queryset(request, queryset, view)
+
+        for term in terms:
+            queryset = queryset.filter(
+                reduce(operator.or_, (self._match(queryset.model, field, term) for field in search_fields))
+            )
+
+        rank = reduce(operator.add, (
+            Coalesce(Similarity(SearchNormalize(F(field)), Value(term)), 0.0)
+            for field in search_fields for term in terms
+        ))
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering or [])
+        return queryset.annotate(search_rank=rank).order_by(F("search_rank").desc(), *ordering)
+
+    @staticmethod
+    def _match(model, path, term):
+        condition = Q(Contains(SearchNormalize(F(path)), term))
+        grams = ngrams(term)
+        if not grams or not uses_ngram_table():
+            return condition
+
+        *relations, field_name = path.split("__")
+        for part in relations:
+            model = model._meta.get_field(part).related_model
+        if field_name not in SEARCH_INDEX.get(model._meta.label, ()):
+            return condition
+
+        # Objetos que tienen todos los trigramas del término en ese campo
+        candidates = (
+            SearchNgram.objects.filter(model=model._meta.label, field=field_name, gram__in=grams)
+            .values("object_id")
+            .annotate(matched=Count("gram"))
+            .filter(matched=len(grams))
+            .values("object_id")
+        )
+        prefix = "__".join(relations)
+        return Q(**{f"{prefix}__pk__in" if prefix else "pk__in": candidates}) & condition
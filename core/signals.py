@@ -0,0 +1,93 @@
+# core/signals.py
+from django.apps import apps
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+from .counters import COUNTED_MODELS, bump_household_count
+from .generations import GENERATION_MODELS, SET_NULL_RELATIONS, household_of, record_changes
+from .search import SEARCH_INDEX, index_objects, register_sqlite_functions, unindex_objects
+
+
+def count_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_household_count(sender, instance.household_id, 1)
+
+
+def count_deleted(sender, instance, **kwargs):
+    bump_household_count(sender, instance.household_id, -1)
+
+
+def changed_objects(instance, deleted):
+    """Objetos sincronizables afectados por el cambio de instance: [(label, id, deleted)]."""
+    label = instance._meta.label
+    if label == "places.PlaceTag":
+        # Los tags viajan dentro del Place
+        return [("places.Place", instance.place_id, False)]
+    changes = [(label, instance.pk, deleted)]
+    if label == "visits.Visit":
+        # Las métricas del Place (y del anterior, si cambió) se actualizan con UPDATE, sin señales
+        old_values = getattr(instance, "_loaded_values", None) or {}
+        for place_id in {instance.place_id, old_values.get("place_id")} - {None}:
+            changes.append(("places.Place", place_id, False))
+    return changes
+
+
+def record_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_changes(household_of(instance), changed_objects(instance, deleted=False))
+
+
+def record_deleted(sender, instance, **kwargs):
+    record_changes(household_of(instance), changed_objects(instance, deleted=True))
+
+
+def record_set_null(sender, instance, **kwargs):
+    """
+    Antes de borrar instance: los hijos que Django va a poner a NULL (SET_NULL) cambian
+    sin señales. Se apuntan aquí, dentro de la transacción del borrado.
+    """
+    for label, field in SET_NULL_RELATIONS:
+        model = apps.get_model(label)
+        if model._meta.get_field(field).related_model is not sender:
+            continue
+        by_household = {}
+        for pk, household_id in model.objects.filter(**{field: instance}).values_list("pk", "household_id"):
+            by_household.setdefault(household_id, []).append((label, pk, False))
+        for household_id, changes in by_household.items():
+            record_changes(household_id, changes)
+
+
+def index_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not set(update_fields) & set(SEARCH_INDEX[sender._meta.label])):
+        return
+    index_objects([instance])
+
+
+def unindex_deleted(sender, instance, **kwargs):
+    unindex_objects(sender._meta.label, [instance.pk])
+
+
+def connect_counters():
+    for label in COUNTED_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(count_created, sender=model, dispatch_uid=f"household_count_save:{label}")
+        post_delete.connect(count_deleted, sender=model, dispatch_uid=f"household_count_delete:{label}")
+
+
+def connect_generations():
+    for label in GENERATION_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(record_saved, sender=model, dispatch_uid=f"household_generation_save:{label}")
+        post_delete.connect(record_deleted, sender=model, dispatch_uid=f"household_generation_delete:{label}")
+    for label, field in SET_NULL_RELATIONS:
+        parent = apps.get_model(label)._meta.get_field(field).related_model
+        uid = f"household_generation_set_null:{parent._meta.label}"
+        pre_delete.connect(record_set_null, sender=parent, dispatch_uid=uid)
+
+
+def connect_search():
+    connection_created.connect(register_sqlite_functions, dispatch_uid="search_sqlite_functions")
+    for label in SEARCH_INDEX:
+        model = apps.get_model(label)
+        post_save.connect(index_saved, sender=model, dispatch_uid=f"search_index_save:{label}")
+        post_delete.connect(unindex_deleted, sender=model, dispatch_uid=f"search_index_delete:{label}")
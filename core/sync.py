@@ -0,0 +1,139 @@
+# core/sync.py
+from django.apps import apps
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from accounts.models import Household
+from .models import SyncEntry
+from .renderers import dumps
+
+
+# Modelos sincronizables: label -> (serializer, prefetch). Los PlaceType globales
+# no entran (son de solo lectura y se listan con /place-types/).
+SYNC_MODELS = {
+    "categorization.PlaceType": ("categorization.api.PlaceTypeSerializer", ()),
+    "categorization.Tag": ("categorization.api.TagSerializer", ()),
+    "places.Place": ("places.api.PlaceSerializer", ("tags",)),
+    "foods.Food": ("foods.api.FoodSerializer", ()),
+    "visits.Visit": ("visits.api.VisitSerializer", ()),
+    "foods.VisitFood": ("foods.api.VisitFoodSerializer", ()),
+}
+
+SYNC_CHUNK_SIZE = 500
+
+
+class SyncView(APIView):
+    """
+    GET /api/v1/sync/?since=<token>
+
+    Cambios del household desde el token: filas creadas/modificadas (con sus datos)
+    y borradas (lápidas), en streaming y por lotes. Sin "since" (o since=0) devuelve
+    todas las filas. La respuesta lleva el "token" para la siguiente llamada.
+
+    El token es la generación del household: cada transacción que cambia datos la
+    incrementa y apunta sus objetos en SyncEntry con ese número, en el mismo commit.
+    Se leen las entradas hasta la generación leída al empezar, así que reanudar con
+    el token no pierde cambios (como mucho repite alguno, y aplicarlo es idempotente).
+
+    Las lápidas antiguas se purgan (prune_sync_tombstones). Si el token es anterior
+    a lo purgado la respuesta es completa ("full": true): el cliente debe sustituir
+    sus datos por los recibidos.
+
+        {"since": 3, "token": "7", "full": false, "changes": [
+            {"model": "visits.Visit", "id": "…", "deleted": false, "data": {…}},
+            {"model": "foods.Food", "id": "…", "deleted": true},
+            …
+        ]}
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        raw = request.query_params.get("since") or "0"
+        try:
+            since = int(raw)
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            raise serializers.ValidationError({"since": "Token de sincronización inválido."})
+
+        household_id = request.user.profile.household_id
+        token, floor = (
+            Household.objects.filter(pk=household_id).values_list("generation", "sync_floor").first() or (0, 0)
+        )
+        context = {"request": request, "view": self}
+
+        full = not since or since < floor
+        if full:
+            rows = self._full_rows(household_id, context)
+        else:
+            rows = self._delta_rows(household_id, since, token, context)
+
+        response = StreamingHttpResponse(
+            self._stream(since, token, full, rows),
+            content_type="application/json",
+        )
+        response["Cache-Control"] = "no-store"
+        return response
+
+    def _stream(self, since, token, full, rows):
+        yield dumps({"since": since, "token": str(token), "full": full})[:-1] + b',"changes":['
+        first = True
+        for row in rows:
+            yield dumps(row) if first else b"," + dumps(row)
+            first = False
+        yield b"]}"
+
+    def _full_rows(self, household_id, context):
+        for label, (serializer_path, prefetch) in SYNC_MODELS.items():
+            qs = apps.get_model(label).objects.filter(household_id=household_id).order_by("pk")
+            if prefetch:
+                qs = qs.prefetch_related(*prefetch)
+            chunk = []
+            for obj in qs.iterator(chunk_size=SYNC_CHUNK_SIZE):
+                chunk.append(obj)
+                if len(chunk) >= SYNC_CHUNK_SIZE:
+                    yield from self._serialize(label, chunk, context)
+                    chunk = []
+            if chunk:
+                yield from self._serialize(label, chunk, context)
+
+    def _delta_rows(self, household_id, since, token, context):
+        entries = SyncEntry.objects.filter(
+            household_id=household_id, seq__gt=since, seq__lte=token, model__in=SYNC_MODELS,
+        ).order_by("seq", "id")
+        last = None
+        while True:
+            page = entries if last is None else entries.filter(
+                Q(seq__gt=last.seq) | Q(seq=last.seq, id__gt=last.id)
+            )
+            chunk = list(page[:SYNC_CHUNK_SIZE])
+            if not chunk:
+                return
+            last = chunk[-1]
+
+            # Filas vivas de este lote: una consulta por modelo
+            live = {}
+            for label in {e.model for e in chunk if not e.deleted}:
+                serializer_path, prefetch = SYNC_MODELS[label]
+                ids = [e.object_id for e in chunk if e.model == label and not e.deleted]
+                qs = apps.get_model(label).objects.filter(household_id=household_id, pk__in=ids)
+                if prefetch:
+                    qs = qs.prefetch_related(*prefetch)
+                for row in self._serialize(label, list(qs), context):
+                    live[(label, row["id"])] = row
+
+            for e in chunk:
+                if e.deleted:
+                    yield {"model": e.model, "id": str(e.object_id), "deleted": True}
+                elif (e.model, str(e.object_id)) in live:
+                    # Si ya no existe, su lápida llegará en una sincronización posterior
+                    yield live[(e.model, str(e.object_id))]
+
+    def _serialize(self, label, objs, context):
+        serializer_class = import_string(SYNC_MODELS[label][0])
+        for data in serializer_class(objs, many=True, context=context).data:
+            yield {"model": label, "id": str(data["id"]), "deleted": False, "data": data}
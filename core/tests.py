@@ -0,0 +1,195 @@
+# core/tests.py
+import json
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITransactionTestCase
+
+from categorization.models import PlaceType
+from locations.models import Area
+from places.models import Place
+from visits.models import Visit
+
+
+class HouseholdTestMixin:
+    """Usuario autenticado con su household, un PlaceType y un Area."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("ana", password="x")
+        self.household = self.user.profile.household
+        self.place_type = PlaceType.objects.create(name="Restaurante")
+        self.area = Area.objects.create(name="Centro")
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since=None):
+        response = self.client.get("/api/v1/sync/", {"since": since} if since is not None else {})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b"".join(response.streaming_content))
+
+    def create_place(self, name="Casa Pepe", **kwargs):
+        return Place.objects.create(household=self.household, name=name, place_type=self.place_type, **kwargs)
+
+
+# Transaccionales: la generación y la caché de respuestas dependen del commit
+class GenerationTests(HouseholdTestMixin, APITransactionTestCase):
+
+    def test_area_delete_changes_places_etag_and_cached_body(self):
+        place = self.create_place(area=self.area)
+        first = self.client.get("/api/v1/places/")
+        self.assertEqual(first.json()["results"][0]["area"], str(self.area.pk))
+        etag = first["ETag"]
+        self.assertEqual(self.client.get("/api/v1/places/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Django pone Place.area a NULL con un UPDATE, sin señales de Place
+        self.assertEqual(self.client.delete(f"/api/v1/areas/{self.area.pk}/").status_code, 204)
+
+        response = self.client.get("/api/v1/places/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIsNone(response.json()["results"][0]["area"])
+        place.refresh_from_db()
+        self.assertIsNone(place.area_id)
+
+
+class ResponseCacheTests(HouseholdTestMixin, APITransactionTestCase):
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "internal", "api.example.com"])
+    def test_pagination_links_follow_host_and_scheme(self):
+        for i in range(25):
+            self.create_place(f"Place {i:02}")
+        self.client.get("/api/v1/places/")  # guarda la respuesta en caché
+        for host, secure in (("internal:8000", False), ("api.example.com", True)):
+            response = self.client.get("/api/v1/places/", HTTP_HOST=host, secure=secure)
+            scheme = "https" if secure else "http"
+            self.assertTrue(response.json()["next"].startswith(f"{scheme}://{host}/"))
+
+
+class SyncTests(HouseholdTestMixin, APITransactionTestCase):
+
+    def test_full_then_delta_with_tombstones(self):
+        kept = self.create_place("Casa Pepe")
+        removed = self.create_place("Bar Manolo")
+        full = self.sync()
+        self.assertTrue(full["full"])
+        self.assertEqual(
+            {(c["model"], c["id"]) for c in full["changes"]},
+            {("places.Place", str(kept.pk)), ("places.Place", str(removed.pk))},
+        )
+
+        self.client.patch(f"/api/v1/places/{kept.pk}/", {"name": "Casa Pepa"}, format="json")
+        self.client.delete(f"/api/v1/places/{removed.pk}/")
+        created = self.create_place("Nuevo")
+
+        delta = self.sync(full["token"])
+        self.assertFalse(delta["full"])
+        changes = {c["id"]: c for c in delta["changes"]}
+        self.assertEqual(changes[str(kept.pk)]["data"]["name"], "Casa Pepa")
+        self.assertEqual(changes[str(removed.pk)], {"model": "places.Place", "id": str(removed.pk), "deleted": True})
+        self.assertIn(str(created.pk), changes)
+
+        self.assertEqual(self.sync(delta["token"])["changes"], [])
+
+    def test_invalid_token(self):
+        for since in ("abc", "-1"):
+            self.assertEqual(self.client.get("/api/v1/sync/", {"since": since}).status_code, 400)
+
+    def test_token_older_than_pruned_tombstones_gets_full_sync(self):
+        removed = self.create_place("Bar Manolo")
+        old_token = self.sync()["token"]
+        removed.delete()
+        self.create_place("Casa Pepe")
+        recent_token = self.sync(old_token)["token"]
+        self.create_place("Nuevo")
+
+        call_command("prune_sync_tombstones", days=0, stdout=StringIO())
+
+        self.household.refresh_from_db()
+        self.assertGreater(self.household.sync_floor, int(old_token))
+        stale = self.sync(old_token)
+        self.assertTrue(stale["full"])
+        self.assertNotIn(str(removed.pk), {c["id"] for c in stale["changes"]})
+        self.assertEqual([c["data"]["name"] for c in self.sync(recent_token)["changes"]], ["Nuevo"])
+        self.assertFalse(self.sync(recent_token)["full"])
+
+    def test_delta_includes_places_nulled_by_area_delete(self):
+        place = self.create_place(area=self.area)
+        token = self.sync()["token"]
+
+        self.client.delete(f"/api/v1/areas/{self.area.pk}/")
+
+        delta = self.sync(token)
+        self.assertFalse(delta["full"])
+        self.assertGreater(int(delta["token"]), int(token))
+        [change] = delta["changes"]
+        self.assertEqual((change["model"], change["id"], change["deleted"]), ("places.Place", str(place.pk), False))
+        self.assertIsNone(change["data"]["area"])
+
+
+class BatchTests(HouseholdTestMixin, APITransactionTestCase):
+    url = "/api/v1/batch/"
+
+    def batch(self, operations, atomic=False):
+        response = self.client.post(self.url, {"atomic": atomic, "operations": operations}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def place_op(self, name="Casa Pepe", ref="p"):
+        body = {"name": name, "place_type": str(self.place_type.pk)}
+        return {"ref": ref, "method": "POST", "path": "places/", "body": body}
+
+    def test_references_between_operations(self):
+        result = self.batch([
+            self.place_op(),
+            {"method": "POST", "path": "visits/", "body": {"place": "{{p.id}}", "date": "2024-05-01", "rating": 8}},
+            {"method": "GET", "path": "/api/v1/places/{{p.id}}/", "query": {"fields": "id,visits_count"}},
+        ], atomic=True)
+        self.assertTrue(result["committed"])
+        self.assertEqual([r["status"] for r in result["results"]], [201, 201, 200])
+        place_id = result["results"][0]["body"]["id"]
+        self.assertEqual(result["results"][2]["body"], {"id": place_id, "visits_count": 1})
+        self.assertEqual(Visit.objects.get().place_id, Place.objects.get().pk)
+
+    def test_atomic_failure_rolls_back(self):
+        result = self.batch([
+            self.place_op(),
+            {"method": "POST", "path": "visits/", "body": {"place": "{{p.id}}", "date": "2024-05-01", "rating": 50}},
+            {"method": "GET", "path": "places/"},
+        ], atomic=True)
+        self.assertFalse(result["committed"])
+        self.assertEqual([r["status"] for r in result["results"]], [201, 400])
+        self.assertFalse(Place.objects.exists())
+
+    def test_non_atomic_keeps_earlier_operations(self):
+        result = self.batch([
+            self.place_op(),
+            self.place_op(name="", ref="bad"),
+            {"method": "GET", "path": "places/{{bad.id}}/"},
+            {"method": "GET", "path": "places/{{p.id}}/"},
+        ])
+        self.assertTrue(result["committed"])
+        self.assertEqual([r["status"] for r in result["results"]], [201, 400, 424, 200])
+        self.assertEqual(Place.objects.count(), 1)
+
+    def test_unexpected_error_only_fails_its_operation(self):
+        with mock.patch("places.api.PlaceViewSet.list", side_effect=RuntimeError), self.assertLogs("core.batch"):
+            result = self.batch([
+                self.place_op(), {"method": "GET", "path": "places/"}, {"method": "GET", "path": "areas/"},
+            ])
+        self.assertEqual([r["status"] for r in result["results"]], [201, 500, 200])
+        self.assertEqual(Place.objects.count(), 1)
+
+    def test_rejected_paths(self):
+        result = self.batch([
+            {"method": "POST", "path": "batch/", "body": {}},
+            {"method": "GET", "path": "no-existe/"},
+        ])
+        self.assertEqual([r["status"] for r in result["results"]], [400, 404])
+
+    def test_duplicate_refs(self):
+        response = self.client.post(
+            self.url, {"operations": [self.place_op(), self.place_op(name="Otro")]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
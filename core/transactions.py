@@ -0,0 +1,54 @@
+# core/transactions.py
+import threading
+import weakref
+
+from django.db import transaction
+
+
+_registry = threading.local()
+
+
+class _Holder:
+    __slots__ = ("value", "__weakref__")
+
+
+def transaction_local(key, factory, on_commit=None):
+    """
+    Valor ligado a la transacción en curso (p. ej. el set de Places pendientes de
+    recalcular). La primera llamada lo crea con factory() y apunta on_commit(valor)
+    para cuando se confirme; las siguientes, en la misma transacción, devuelven el
+    mismo objeto. Solo dentro de un bloque atómico.
+
+    El único que mantiene vivo el valor es ese callback de on_commit: si la
+    transacción (o el savepoint en el que se creó) hace rollback, Django lo descarta
+    y el valor desaparece con él, así que la siguiente transacción empieza de cero.
+    """
+    refs = _refs()
+    holder = refs[key]() if key in refs else None
+    if holder is None:
+        holder = _Holder()
+        holder.value = factory()
+        refs[key] = weakref.ref(holder)
+        transaction.on_commit(lambda: _committed(key, holder, on_commit))
+    return holder.value
+
+
+def current_transaction_local(key):
+    """El valor de transaction_local(key) en la transacción en curso, o None si no hay."""
+    ref = _refs().get(key)
+    holder = ref() if ref is not None else None
+    return holder.value if holder is not None else None
+
+
+def _refs() -> dict:
+    if not hasattr(_registry, "refs"):
+        _registry.refs = {}
+    return _registry.refs
+
+
+def _committed(key, holder, on_commit):
+    refs = _refs()
+    if key in refs and refs[key]() is holder:
+        del refs[key]
+    if on_commit is not None:
+        on_commit(holder.value)
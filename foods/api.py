@@ -1,18 +1,21 @@
 from rest_framework import serializers
 from django_filters import rest_framework as filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from django.db.models import OuterRef, Subquery
+from django.shortcuts import get_object_or_404
 from core.api import HouseholdScopedViewSet
+from core.pagination import decode_cursor, encode_cursor, keyset_after, keyset_ordering
 from core.validators import (
     validate_rating_1_to_10,
     validate_price_non_negative,
     validate_non_blank_trimmed,
 )
 
-from .models import Food, VisitFood
-from places.models import Place
+from .models import Food, FoodPlaceLatest, VisitFood
+from .name_index import get_food_name_index
+from .services import foods_by_id, merge_foods
 
 
 # ---------- Food ----------
@@ -31,6 +34,10 @@ class FoodSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class FoodMergeSerializer(serializers.Serializer):
+    sources = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=500)
+
+
 class FoodFilter(filters.FilterSet):
     name = filters.CharFilter(field_name="name", lookup_expr="icontains")
 
@@ -49,70 +56,142 @@ class FoodViewSet(HouseholdScopedViewSet):
     search_fields = ["name"]
     ordering_fields = ["name", "created_at", "updated_at"]
 
+    # Claves de orden de latest-by-place: (campo, descending, nullable); visit_food desempata
+    LATEST_BY_PLACE_ORDERINGS = {
+        "rating_desc": [("rating", True, False)],
+        "price_asc": [("price_paid", False, True)],
+        "date_desc": [],
+    }
+    LATEST_BY_PLACE_TIEBREAK = [
+        ("visit_date", True, False),
+        ("visit_food_created_at", True, False),
+        ("visit_food", True, False),
+    ]
+
+    AUTOCOMPLETE_DEFAULT_LIMIT = 10
+    AUTOCOMPLETE_MAX_LIMIT = 50
+
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request):
+        """
+        GET /foods/autocomplete/?q=pul[&limit=10]
+        Foods activos con alguna palabra que empieza por q (sin mayúsculas ni acentos),
+        ordenados por nº de usos. Sale de un índice en memoria por household
+        (foods/name_index.py): con el índice ya cargado no consulta la BD.
+        """
+        try:
+            limit = int(request.query_params.get("limit", self.AUTOCOMPLETE_DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError({"limit": "Debe ser un entero."})
+        limit = max(1, min(limit, self.AUTOCOMPLETE_MAX_LIMIT))
+
+        index = get_food_name_index(request.user.profile.household_id)
+        return Response(index.complete(request.query_params.get("q", ""), limit))
+
+    @action(detail=True, methods=["post"])
+    def merge(self, request, pk=None):
+        """
+        POST /foods/{pk}/merge/  {"sources": [food_id, ...]}
+        Funde los Foods sources en {pk} (duplicados, erratas): sus VisitFood pasan a
+        {pk} con un solo UPDATE y los sources se borran, todo en una transacción.
+        """
+        target = self.get_object()
+        ser = FoodMergeSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        source_ids = set(ser.validated_data["sources"])
+        if target.pk in source_ids:
+            raise ValidationError({"sources": "No puede incluir el Food destino."})
+
+        sources = foods_by_id(target.household_id, source_ids)
+        missing = source_ids - sources.keys()
+        if missing:
+            raise ValidationError(
+                {"sources": f"No existen o no pertenecen a tu household: {sorted(map(str, missing))}."}
+            )
+
+        moved = merge_foods(target, sources.values())
+        return Response({
+            "food": self.get_serializer(target).data,
+            "merged": sorted(str(pk) for pk in source_ids),
+            "visit_foods_moved": moved,
+        })
+
     @action(detail=True, methods=["get"], url_path="latest-by-place")
     def latest_by_place(self, request, pk=None):
         """
         Para el Food {pk}, devuelve la última VisitFood por cada Place.
         Filtros opcionales: area, place_type, price_range, min_rating
         Orden: rating_desc (default), price_asc, date_desc
+        Paginación keyset opcional: ?limit=N[&cursor=...] → {"next_cursor", "results"}
+
+        Lee la tabla mantenida FoodPlaceLatest (una fila por food y place).
         """
-        food = self.get_queryset().get(pk=pk)
+        food = get_object_or_404(self.get_queryset(), pk=pk)
         hh = request.user.profile.household
+        q = request.query_params
 
-        # Subquery: última VisitFood para ese food en cada place
-        vf = VisitFood.objects.filter(food=food, visit__place=OuterRef("pk")) \
-                              .order_by("-visit__date", "-created_at")
-
-        places_qs = Place.objects.filter(household=hh)
+        latest = FoodPlaceLatest.objects.select_related("place").filter(food=food, place__household=hh)
 
         # Filtros opcionales
-        q = request.query_params
         if q.get("area"):
-            places_qs = places_qs.filter(area=q["area"])
+            latest = latest.filter(place__area=q["area"])
         if q.get("place_type"):
-            places_qs = places_qs.filter(place_type=q["place_type"])
+            latest = latest.filter(place__place_type=q["place_type"])
         if q.get("price_range"):
-            places_qs = places_qs.filter(price_range=q["price_range"])
-
-        # Anotar el ID del último VisitFood por place y quedarnos con los que tienen alguno
-        places_qs = places_qs.annotate(
-            latest_visitfood_id=Subquery(vf.values("id")[:1])
-        ).filter(latest_visitfood_id__isnull=False)
-
-        # Recuperar esos VisitFood
-        latest_ids = list(places_qs.values_list("latest_visitfood_id", flat=True))
-        latest_vf = VisitFood.objects.select_related("visit", "visit__place").filter(id__in=latest_ids)
+            latest = latest.filter(place__price_range=q["price_range"])
 
         # (Nuevo) min_rating si viene
         if q.get("min_rating"):
             try:
                 min_r = float(q["min_rating"])
-                latest_vf = latest_vf.filter(rating__gte=min_r)
+                latest = latest.filter(rating__gte=min_r)
             except ValueError:
                 pass  # si viene mal, lo ignoramos silenciosamente
 
         # Orden
         ordering = q.get("ordering", "rating_desc")
-        if ordering == "price_asc":
-            latest_vf = latest_vf.order_by("price_paid", "-visit__date", "-created_at")
-        elif ordering == "date_desc":
-            latest_vf = latest_vf.order_by("-visit__date", "-created_at")
-        else:  # rating_desc
-            latest_vf = latest_vf.order_by("-rating", "-visit__date", "-created_at")
-
-        data = [
-            {
-                "visit_food_id": x.id,
-                "food_id": x.food_id,
-                "place_id": x.visit.place_id,
-                "place_name": x.visit.place.name,
-                "rating": float(x.rating),
-                "price_paid": float(x.price_paid) if x.price_paid is not None else None,
-                "visit_date": x.visit.date.isoformat(),
-            }
-            for x in latest_vf
-        ]
-        return Response(data)
+        keys = self.LATEST_BY_PLACE_ORDERINGS.get(ordering, self.LATEST_BY_PLACE_ORDERINGS["rating_desc"]) \
+            + self.LATEST_BY_PLACE_TIEBREAK
+        latest = latest.order_by(*keyset_ordering(keys))
+
+        limit = q.get("limit")
+        if limit is None:
+            return Response([self._latest_by_place_row(x) for x in latest])
+
+        # Paginación keyset: el cursor lleva los valores de orden de la última fila
+        try:
+            limit = min(max(int(limit), 1), 500)
+        except ValueError:
+            raise ValidationError({"limit": "Debe ser un entero."})
+        key_fields = [FoodPlaceLatest._meta.get_field(name) for name, _, _ in keys]
+        if q.get("cursor"):
+            try:
+                after = decode_cursor(q["cursor"], key_fields)
+            except ValueError:
+                raise ValidationError({"cursor": "Cursor inválido."})
+            latest = latest.filter(keyset_after(keys, after))
+
+        page = list(latest[:limit + 1])
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor([getattr(page[-1], f.attname) for f in key_fields])
+        return Response({
+            "next_cursor": next_cursor,
+            "results": [self._latest_by_place_row(x) for x in page],
+        })
+
+    @staticmethod
+    def _latest_by_place_row(x):
+        return {
+            "visit_food_id": x.visit_food_id,
+            "food_id": x.food_id,
+            "place_id": x.place_id,
+            "place_name": x.place.name,
+            "rating": float(x.rating),
+            "price_paid": float(x.price_paid) if x.price_paid is not None else None,
+            "visit_date": x.visit_date.isoformat(),
+        }
 
 
 # ---------- VisitFood ----------
@@ -126,8 +205,8 @@ class VisitFoodSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = VisitFood
-        fields = ["id", "visit", "food", "rating", "price_paid", "comment", "created_at"]
-        read_only_fields = ["created_at"]
+        fields = ["id", "visit", "food", "rating", "price_paid", "comment", "created_at", "updated_at"]
+        read_only_fields = ["created_at", "updated_at"]
 
     def validate(self, attrs):
         """
@@ -170,6 +249,7 @@ class VisitFoodViewSet(HouseholdScopedViewSet):
     serializer_class = VisitFoodSerializer
     filterset_class = VisitFoodFilter
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
+    fast_list = True
 
     search_fields = ["food__name", "visit__place__name", "comment"]
     ordering_fields = ["created_at", "rating", "price_paid"]
\ No newline at end of file
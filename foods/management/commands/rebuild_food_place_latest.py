@@ -0,0 +1,24 @@
+# foods/management/commands/rebuild_food_place_latest.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from foods.services import rebuild_food_place_latest
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla FoodPlaceLatest (última VisitFood por food y place)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--household", help="Limitar a un household (UUID).")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Filas por INSERT (default 1000).")
+
+    def handle(self, *args, **opts):
+        if opts["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser >= 1")
+
+        started = time.monotonic()
+        written = rebuild_food_place_latest(opts["household"], batch_size=opts["batch_size"])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(f"{written} filas FoodPlaceLatest en {elapsed:.2f}s"))
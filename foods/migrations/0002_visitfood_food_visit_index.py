@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-18 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foods", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="visitfood",
+            name="idx_visitfood_food",
+        ),
+        migrations.AddIndex(
+            model_name="visitfood",
+            index=models.Index(
+                fields=["food", "visit"], name="idx_visitfood_food_visit"
+            ),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.25 on 2026-10-18 16:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("places", "0002_place_metric_sums"),
+        ("foods", "0002_visitfood_food_visit_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FoodPlaceLatest",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rating", models.DecimalField(decimal_places=1, max_digits=3)),
+                (
+                    "price_paid",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=7, null=True
+                    ),
+                ),
+                ("visit_date", models.DateField()),
+                ("visit_food_created_at", models.DateTimeField()),
+                ("tastings", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "food",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="latest_by_place",
+                        to="foods.food",
+                    ),
+                ),
+                (
+                    "place",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="latest_foods",
+                        to="places.place",
+                    ),
+                ),
+                (
+                    "visit_food",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="foods.visitfood",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="foodplacelatest",
+            constraint=models.UniqueConstraint(
+                fields=("food", "place"), name="uniq_foodplacelatest_food_place"
+            ),
+        ),
+    ]
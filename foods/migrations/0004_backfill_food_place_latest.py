@@ -0,0 +1,58 @@
+from django.db import migrations
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+
+def backfill_food_place_latest(apps, schema_editor):
+    """Rellena FoodPlaceLatest con la última VisitFood de cada (food, place)."""
+    VisitFood = apps.get_model("foods", "VisitFood")
+    FoodPlaceLatest = apps.get_model("foods", "FoodPlaceLatest")
+
+    partition = [F("food"), F("visit__place")]
+    rows = (
+        VisitFood.objects.annotate(
+            place_key=F("visit__place"),
+            visit_date=F("visit__date"),
+            rn=Window(
+                RowNumber(),
+                partition_by=partition,
+                order_by=[F("visit__date").desc(), F("created_at").desc()],
+            ),
+            group_size=Window(Count("id"), partition_by=partition),
+        )
+        .filter(rn=1)
+        .values(
+            "id", "food_id", "place_key", "rating", "price_paid",
+            "visit_date", "created_at", "group_size",
+        )
+    )
+
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        batch.append(
+            FoodPlaceLatest(
+                food_id=row["food_id"],
+                place_id=row["place_key"],
+                visit_food_id=row["id"],
+                rating=row["rating"],
+                price_paid=row["price_paid"],
+                visit_date=row["visit_date"],
+                visit_food_created_at=row["created_at"],
+                tastings=row["group_size"],
+            )
+        )
+        if len(batch) >= 1000:
+            FoodPlaceLatest.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        FoodPlaceLatest.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foods", "0003_food_place_latest"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_food_place_latest, migrations.RunPython.noop),
+    ]
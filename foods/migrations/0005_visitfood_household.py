@@ -0,0 +1,23 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("foods", "0004_backfill_food_place_latest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="visitfood",
+            name="household",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="visit_foods",
+                to="accounts.household",
+            ),
+        ),
+    ]
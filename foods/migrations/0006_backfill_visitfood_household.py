@@ -0,0 +1,24 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_visitfood_household(apps, schema_editor):
+    """Copia visit.household en cada VisitFood con un único UPDATE."""
+    Visit = apps.get_model("visits", "Visit")
+    VisitFood = apps.get_model("foods", "VisitFood")
+    VisitFood.objects.filter(household__isnull=True).update(
+        household_id=Subquery(
+            Visit.objects.filter(pk=OuterRef("visit_id")).values("household_id")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foods", "0005_visitfood_household"),
+        ("visits", "0006_backfill_visit_household"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_visitfood_household, migrations.RunPython.noop),
+    ]
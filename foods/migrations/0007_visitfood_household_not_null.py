@@ -0,0 +1,27 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foods", "0006_backfill_visitfood_household"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="visitfood",
+            name="household",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="visit_foods",
+                to="accounts.household",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="visitfood",
+            index=models.Index(
+                fields=["household", "-created_at"], name="idx_visitfood_hh_created"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_visitfood_updated_at(apps, schema_editor):
+    """Las filas existentes no tienen historial de cambios: updated_at = created_at."""
+    apps.get_model("foods", "VisitFood").objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foods", "0007_visitfood_household_not_null"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="visitfood",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_visitfood_updated_at, migrations.RunPython.noop),
+    ]
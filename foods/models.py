@@ -7,6 +7,7 @@ from django.db.models.functions import Lower
 from django.core.exceptions import ValidationError
 
 from accounts.models import Household
+from places.models import Place
 from visits.models import Visit
 
 
@@ -51,6 +52,10 @@ class VisitFood(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     visit = models.ForeignKey(Visit, on_delete=models.CASCADE, related_name="visit_foods")
+    # Denormalizado de visit.household: scope por tenant sin join (se rellena en save)
+    household = models.ForeignKey(
+        Household, on_delete=models.PROTECT, related_name="visit_foods", editable=False
+    )
     food = models.ForeignKey(Food, on_delete=models.PROTECT, related_name="visit_foods")
 
     rating = models.DecimalField(max_digits=3, decimal_places=1)  # 1–10
@@ -58,12 +63,19 @@ class VisitFood(models.Model):
     comment = models.TextField(blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Campos cuyo valor persistido necesitan las señales (FoodPlaceLatest)
+    TRACKED_FIELDS = ("food_id", "visit_id")
 
     class Meta:
         indexes = [
-            Index(fields=["food"], name="idx_visitfood_food"),
+            # (food, visit): candidatas de latest-by-place sin tocar la tabla (cubre también food)
+            Index(fields=["food", "visit"], name="idx_visitfood_food_visit"),
             Index(fields=["visit"], name="idx_visitfood_visit"),
             Index(fields=["created_at"], name="idx_visitfood_created"),
+            # Listado por household con el orden por defecto (-created_at)
+            Index(fields=["household", "-created_at"], name="idx_visitfood_hh_created"),
         ]
 
     def __str__(self):
@@ -74,3 +86,48 @@ class VisitFood(models.Model):
             raise ValidationError("rating debe estar entre 1.0 y 10.0")
         if self.price_paid is not None and self.price_paid < 0:
             raise ValidationError("price_paid no puede ser negativo")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(f in instance.__dict__ for f in cls.TRACKED_FIELDS):
+            instance.snapshot_values()
+        return instance
+
+    def snapshot_values(self):
+        self._loaded_values = {f: getattr(self, f) for f in self.TRACKED_FIELDS}
+
+    def save(self, *args, **kwargs):
+        if self.household_id is None and self.visit_id is not None:
+            self.household_id = self.visit.household_id
+        super().save(*args, **kwargs)
+        self.snapshot_values()
+
+
+class FoodPlaceLatest(models.Model):
+    """
+    Última VisitFood de cada Food en cada Place (denormalizado).
+    - Se mantiene desde las señales de VisitFood/Visit (foods.signals) y los
+      caminos de bulk_create; se reconstruye con rebuild_food_place_latest.
+    - "Última" = mayor (visit.date, visit_food.created_at).
+    - tastings: nº total de VisitFood de ese food en ese place.
+    """
+    food = models.ForeignKey(Food, on_delete=models.CASCADE, related_name="latest_by_place")
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name="latest_foods")
+    visit_food = models.ForeignKey(VisitFood, on_delete=models.CASCADE, related_name="+")
+
+    rating = models.DecimalField(max_digits=3, decimal_places=1)
+    price_paid = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    visit_date = models.DateField()
+    visit_food_created_at = models.DateTimeField()
+    tastings = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["food", "place"], name="uniq_foodplacelatest_food_place"),
+        ]
+
+    def __str__(self):
+        return f"{self.food_id} @ {self.place_id} ({self.rating})"
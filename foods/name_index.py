@@ -0,0 +1,212 @@
+# foods/name_index.py
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import cached_property
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from core.search import normalize
+from .models import Food, VisitFood
+
+
+# Similitud mínima (1 - distancia de edición / longitud) para dar un nombre por
+# el mismo Food: un error desde 7 letras, dos desde 14.
+FUZZY_MIN_SIMILARITY = 0.85
+
+
+class FoodNameIndex:
+    """
+    Nombres de los Food activos de un household, normalizados (minúsculas, sin
+    acentos), con su nº de usos (VisitFoods). Para autocompletar guarda, ordenados,
+    los sufijos del nombre que empiezan palabra ("pulpo a feira", "a feira", "feira"),
+    así que un prefijo se resuelve con una búsqueda binaria. inactive_names son los
+    nombres de los Food desactivados: no se sugieren, pero cuentan como coincidencia exacta.
+    """
+
+    def __init__(self, foods, uses, inactive_names=()):
+        self.inactive_names = list(inactive_names)
+        self.foods = {}  # id -> (nombre, nombre normalizado, usos)
+        keys = []
+        for food_id, name in foods:
+            norm = normalize(name)
+            self.foods[food_id] = (name, norm, uses.get(food_id, 0))
+            for start, char in enumerate(norm):
+                if char.isalnum() and (start == 0 or not norm[start - 1].isalnum()):
+                    keys.append((norm[start:], food_id))
+        keys.sort()
+        self.keys = [key for key, _ in keys]
+        self.key_ids = [food_id for _, food_id in keys]
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, household_id):
+        foods = Food.objects.filter(household_id=household_id).values_list("id", "name", "is_active")
+        uses = (
+            VisitFood.objects.filter(household_id=household_id)
+            .values("food_id").annotate(n=Count("id")).values_list("food_id", "n").order_by()
+        )
+        foods = list(foods)
+        return cls(
+            [(food_id, name) for food_id, name, is_active in foods if is_active],
+            dict(uses),
+            inactive_names=[name for _, name, is_active in foods if not is_active],
+        )
+
+    def complete(self, prefix, limit=10) -> list:
+        """Foods con alguna palabra que empieza por prefix, por nº de usos y nombre."""
+        prefix = normalize(prefix).lstrip()
+        if not prefix:
+            return []
+        found = set()
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            found.add(self.key_ids[i])
+            i += 1
+        ranked = sorted(found, key=lambda food_id: (-self.foods[food_id][2], self.foods[food_id][1]))
+        return [
+            {"id": food_id, "name": self.foods[food_id][0], "uses": self.foods[food_id][2]}
+            for food_id in ranked[:limit]
+        ]
+
+    def match(self, name, min_similarity):
+        """
+        Food más parecido a name por distancia de edición normalizada sobre los nombres
+        normalizados: (food_id, similitud) si llega a min_similarity, o None. Solo se
+        comparan los Foods que comparten algún trigrama con name.
+        """
+        norm = normalize(name).strip()
+        if not norm:
+            return None
+        candidates = set()
+        for gram in _trigrams(norm):
+            candidates.update(self.by_trigram.get(gram, ()))
+
+        best = None
+        for food_id in candidates:
+            other = self.foods[food_id][1]
+            score = 1 - edit_distance(norm, other) / max(len(norm), len(other))
+            if score >= min_similarity and (best is None or (score, self.foods[food_id][2]) > best[1:]):
+                best = (food_id, score, self.foods[food_id][2])
+        return best and (best[0], round(best[1], 3))
+
+    @cached_property
+    def lower_names(self) -> set:
+        """Nombres en minúsculas de todos los Food, también los inactivos."""
+        return {name.lower() for name, _, _ in self.foods.values()} | {
+            name.lower() for name in self.inactive_names
+        }
+
+    @cached_property
+    def by_trigram(self):
+        """trigrama -> ids de Food (para match), calculado la primera vez que se usa."""
+        index = {}
+        for food_id, (_, norm, _) in self.foods.items():
+            for gram in _trigrams(norm):
+                index.setdefault(gram, set()).add(food_id)
+        return index
+
+
+def _trigrams(text) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b) -> int:
+    """
+    Distancia de Damerau-Levenshtein restringida (optimal string alignment): inserciones,
+    borrados, sustituciones y trasposiciones de dos letras seguidas ("fiera" / "feira"
+    es un solo error).
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        before, previous = previous, current
+    return previous[-1]
+
+
+class FoodNameIndexCache:
+    """
+    Índices por household en memoria del proceso, con LRU por nº de households.
+    Las señales de Food/VisitFood invalidan el del household en este proceso; el TTL
+    acota lo desfasados que pueden quedar los de otros procesos (workers).
+    """
+
+    def __init__(self, max_households=256, ttl=60):
+        self.max_households = max_households
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        # household -> nº de invalidaciones: un índice construido mientras llega una no se guarda
+        self.versions = {}
+
+    def get(self, household_id) -> FoodNameIndex:
+        with self.lock:
+            index = self.entries.get(household_id)
+            if index is not None and time.monotonic() - index.built_at < self.ttl:
+                self.entries.move_to_end(household_id)
+                return index
+            version = self.versions.get(household_id, 0)
+
+        index = FoodNameIndex.build(household_id)  # fuera del lock: no bloquea a otros households
+        with self.lock:
+            if self.versions.get(household_id, 0) != version:
+                # Invalidado durante la construcción: puede venir de datos de antes del commit
+                return index
+            self.entries[household_id] = index
+            self.entries.move_to_end(household_id)
+            while len(self.entries) > self.max_households:
+                self.entries.popitem(last=False)
+        return index
+
+    def invalidate(self, household_id) -> None:
+        with self.lock:
+            self.entries.pop(household_id, None)
+            self.versions[household_id] = self.versions.get(household_id, 0) + 1
+
+
+_cache = None
+
+
+def get_food_name_index(household_id) -> FoodNameIndex:
+    global _cache
+    if _cache is None:
+        options = getattr(settings, "FOOD_NAME_INDEX", {})
+        _cache = FoodNameIndexCache(
+            max_households=options.get("MAX_HOUSEHOLDS", 256),
+            ttl=options.get("TTL", 60),
+        )
+    return _cache.get(household_id)
+
+
+def invalidate_food_name_index(household_id) -> None:
+    """Descarta el índice del household cuando se confirme la transacción en curso."""
+    if _cache is not None and household_id is not None:
+        transaction.on_commit(lambda: _cache.invalidate(household_id))
+
+
+def match_food_names(household_id, names, min_similarity=FUZZY_MIN_SIMILARITY) -> dict:
+    """
+    Para los nombres sin un Food igual (sin distinguir mayúsculas), el Food del household
+    que más se le parece (erratas, acentos): {nombre: (food_id, similitud)}. Usa el índice
+    en memoria, así que los IDs deben comprobarse contra la BD antes de usarlos.
+    """
+    index = get_food_name_index(household_id)
+    matched = {}
+    for name in dict.fromkeys(names):
+        if name.lower() in index.lower_names:
+            continue
+        hit = index.match(name, min_similarity)
+        if hit is not None:
+            matched[name] = hit
+    return matched
@@ -0,0 +1,215 @@
+# foods/services.py
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Value, Window
+from django.db.models.functions import Lower, RowNumber
+from django.utils import timezone
+
+from core.generations import ALL_HOUSEHOLDS, bump_generation, record_changes
+from core.search import index_objects
+from core.transactions import current_transaction_local, transaction_local
+from .models import Food, FoodPlaceLatest, VisitFood
+from .name_index import invalidate_food_name_index
+
+
+def foods_by_id(household_id, food_ids) -> dict:
+    """
+    Resuelve varios Food por ID en una sola consulta, limitados al household.
+    Los IDs que no existan (o sean de otro household) no aparecen en el resultado.
+    """
+    food_ids = set(food_ids)
+    if not food_ids:
+        return {}
+    return {f.id: f for f in Food.objects.filter(household_id=household_id, id__in=food_ids)}
+
+
+def get_or_create_foods_by_name(household_id, names, created=None) -> dict:
+    """
+    Equivalente por lotes de get_or_create(household, name), case-insensitive:
+    - Una consulta por Lower(name) para los existentes.
+    - Un bulk_create para los nuevos (deduplicados en minúsculas, respetando
+      uniq_food_household_lower_name; el primer nombre recibido fija el formato).
+    - Si otra petición concurrente creó alguno, se relee en una consulta más.
+    Devuelve {nombre_en_minúsculas: Food}. Si se pasa created (un set), se le
+    añaden los nombres en minúsculas que no existían.
+    """
+    wanted = {}
+    for name in names:
+        wanted.setdefault(name.lower(), name)
+    if not wanted:
+        return {}
+
+    def lookup(names):
+        # LOWER(name) = LOWER(%s), las dos en la BD (como la restricción única): el
+        # LOWER de SQLite solo cambia letras ASCII, así que comparar con el str.lower()
+        # de Python no encontraría "ÑOQUIS". El resultado se indexa con el de Python.
+        return {
+            f.name.lower(): f
+            for f in Food.objects.annotate(lname=Lower("name")).filter(
+                household_id=household_id, lname__in=[Lower(Value(name)) for name in names]
+            )
+        }
+
+    found = lookup(wanted.values())
+    missing = [key for key in wanted if key not in found]
+    if created is not None:
+        created.update(missing)
+    if missing:
+        Food.objects.bulk_create(
+            [Food(household_id=household_id, name=wanted[key]) for key in missing],
+            ignore_conflicts=True,
+        )
+        new_foods = lookup(wanted[key] for key in missing)
+        # bulk_create no lanza señales
+        index_objects(new_foods.values())
+        invalidate_food_name_index(household_id)
+        found.update(new_foods)
+    return found
+
+
+@transaction.atomic
+def merge_foods(target: Food, sources) -> int:
+    """
+    Funde los Food sources en target: un UPDATE repunta todas sus VisitFood, se
+    borran los sources (con sus FoodPlaceLatest, en cascada) y se recalculan una vez
+    las FoodPlaceLatest de target en los places afectados. Devuelve las VisitFood movidas.
+    """
+    source_ids = [food.pk for food in sources]
+    # Bloquea target y sources frente a otras fusiones o escrituras concurrentes
+    list(Food.objects.select_for_update().filter(id__in=[target.pk, *source_ids]).values_list("id"))
+
+    moved_qs = VisitFood.objects.filter(food_id__in=source_ids)
+    moved_ids = list(moved_qs.values_list("id", flat=True))
+    place_ids = set(moved_qs.values_list("visit__place_id", flat=True).distinct())
+
+    moved = moved_qs.update(food=target, updated_at=timezone.now())
+    Food.objects.filter(id__in=source_ids).delete()
+    refresh_food_place_latest({(target.pk, place_id) for place_id in place_ids})
+
+    # El UPDATE no lanza señales: sincronización y caché de las VisitFood movidas
+    record_changes(target.household_id, [("foods.VisitFood", pk, False) for pk in moved_ids])
+    invalidate_food_name_index(target.household_id)
+    return moved
+
+
+# ------------------------------------------------------------
+# FoodPlaceLatest: última VisitFood por (food, place)
+# ------------------------------------------------------------
+
+FOOD_PLACE_LATEST_FIELDS = ["visit_food", "rating", "price_paid", "visit_date", "visit_food_created_at", "tastings"]
+
+
+def latest_per_food_place(visit_foods):
+    """
+    Para un queryset de VisitFood, la última de cada (food, place) según
+    (visit.date, created_at), con el nº de VisitFood del grupo. Una consulta
+    con ROW_NUMBER()/COUNT() OVER (PARTITION BY food, place).
+    """
+    partition = [F("food"), F("visit__place")]
+    return visit_foods.annotate(
+        place_key=F("visit__place"),
+        visit_date=F("visit__date"),
+        rn=Window(RowNumber(), partition_by=partition,
+                  order_by=[F("visit__date").desc(), F("created_at").desc()]),
+        group_size=Window(Count("id"), partition_by=partition),
+    ).filter(rn=1).values(
+        "id", "food_id", "place_key", "rating", "price_paid", "visit_date", "created_at", "group_size",
+    )
+
+
+def _latest_from_row(row) -> FoodPlaceLatest:
+    return FoodPlaceLatest(
+        food_id=row["food_id"],
+        place_id=row["place_key"],
+        visit_food_id=row["id"],
+        rating=row["rating"],
+        price_paid=row["price_paid"],
+        visit_date=row["visit_date"],
+        visit_food_created_at=row["created_at"],
+        tastings=row["group_size"],
+    )
+
+
+def refresh_food_place_latest(keys) -> None:
+    """
+    Recalcula las filas FoodPlaceLatest de los pares (food_id, place_id) indicados:
+    una consulta de lectura, un upsert y (si algún par se quedó sin VisitFood) un DELETE.
+    """
+    keys = {(food_id, place_id) for food_id, place_id in keys if food_id and place_id}
+    if not keys:
+        return
+
+    rows = latest_per_food_place(VisitFood.objects.filter(
+        food_id__in={k[0] for k in keys},
+        visit__place_id__in={k[1] for k in keys},
+    ))
+    objs = [_latest_from_row(r) for r in rows if (r["food_id"], r["place_key"]) in keys]
+
+    gone = keys - {(o.food_id, o.place_id) for o in objs}
+    if gone:
+        FoodPlaceLatest.objects.filter(
+            reduce(or_, (Q(food_id=f, place_id=p) for f, p in gone))
+        ).delete()
+    if objs:
+        FoodPlaceLatest.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=["food", "place"],
+            update_fields=FOOD_PLACE_LATEST_FIELDS + ["updated_at"],
+        )
+
+
+def rebuild_food_place_latest(household_id=None, batch_size=1000) -> int:
+    """Reconstruye FoodPlaceLatest entero (o de un household). Devuelve las filas escritas."""
+    visit_foods = VisitFood.objects.all()
+    existing = FoodPlaceLatest.objects.all()
+    if household_id:
+        visit_foods = visit_foods.filter(household_id=household_id)
+        existing = existing.filter(place__household_id=household_id)
+
+    written = 0
+    with transaction.atomic():
+        existing.delete()
+        batch = []
+        for row in latest_per_food_place(visit_foods).iterator(chunk_size=batch_size):
+            batch.append(_latest_from_row(row))
+            if len(batch) >= batch_size:
+                FoodPlaceLatest.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            FoodPlaceLatest.objects.bulk_create(batch)
+            written += len(batch)
+        # Sin señales: invalida la caché de respuestas de los households afectados
+        bump_generation(household_id or ALL_HOUSEHOLDS)
+    return written
+
+
+# Clave de transaction_local() con los pares pendientes de la transacción en curso
+DIRTY_FOOD_PLACES = "foods.dirty_food_places"
+
+
+def mark_food_place_dirty(keys) -> None:
+    """
+    Apunta pares (food_id, place_id) a refrescar. Dentro de una transacción se
+    refrescan todos juntos, una vez, al confirmarla (y se olvidan si hace rollback);
+    fuera, en el momento.
+    """
+    keys = set(keys)
+    if not transaction.get_connection().in_atomic_block:
+        refresh_food_place_latest(keys)
+        return
+    transaction_local(DIRTY_FOOD_PLACES, set, _refresh_pending).update(keys)
+
+
+def flush_food_place_dirty() -> None:
+    """Refresca ya los pares pendientes de la transacción en curso."""
+    _refresh_pending(current_transaction_local(DIRTY_FOOD_PLACES))
+
+
+def _refresh_pending(keys) -> None:
+    if keys:
+        refresh_food_place_latest(set(keys))
+        keys.clear()
@@ -0,0 +1,68 @@
+# foods/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from core.transactions import current_transaction_local, transaction_local
+from visits.models import Visit
+from .models import Food, VisitFood
+from .name_index import invalidate_food_name_index
+from .services import mark_food_place_dirty
+
+
+# visit_id -> place_id de las visitas que se están borrando en la transacción en curso
+DELETING_VISITS = "foods.deleting_visits"
+
+
+def _place_of(visit_food: VisitFood, visit_id):
+    if visit_id == visit_food.visit_id and VisitFood.visit.is_cached(visit_food):
+        return visit_food.visit.place_id
+    deleting = current_transaction_local(DELETING_VISITS)
+    if deleting and visit_id in deleting:
+        return deleting[visit_id]
+    return Visit.objects.filter(id=visit_id).values_list("place_id", flat=True).first()
+
+
+@receiver(pre_delete, sender=Visit)
+def visit_deleting(sender, instance: Visit, **kwargs):
+    """
+    Apunta el Place de la visita antes de borrarla: sus VisitFood se borran en cascada
+    y, sin él, cada una buscaría el suyo con una consulta.
+    """
+    if transaction.get_connection().in_atomic_block:
+        transaction_local(DELETING_VISITS, dict)[instance.pk] = instance.place_id
+
+
+@receiver(post_save, sender=VisitFood)
+def visit_food_saved(sender, instance: VisitFood, created, **kwargs):
+    keys = {(instance.food_id, _place_of(instance, instance.visit_id))}
+    old = getattr(instance, "_loaded_values", None)
+    if old and (old["food_id"], old["visit_id"]) != (instance.food_id, instance.visit_id):
+        keys.add((old["food_id"], _place_of(instance, old["visit_id"])))
+    mark_food_place_dirty(keys)
+    invalidate_food_name_index(instance.household_id)  # cambian los usos
+
+
+@receiver(post_delete, sender=VisitFood)
+def visit_food_deleted(sender, instance: VisitFood, **kwargs):
+    mark_food_place_dirty({(instance.food_id, _place_of(instance, instance.visit_id))})
+    invalidate_food_name_index(instance.household_id)
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+def food_changed(sender, instance: Food, **kwargs):
+    invalidate_food_name_index(instance.household_id)
+
+
+@receiver(post_save, sender=Visit)
+def visit_saved(sender, instance: Visit, created, **kwargs):
+    """Cambiar la fecha o el lugar de una visita puede cambiar cuál es la última VisitFood."""
+    old = getattr(instance, "_loaded_values", None)
+    if created or old is None:
+        return
+    if (old["date"], old["place_id"]) == (instance.date, instance.place_id):
+        return
+    food_ids = set(VisitFood.objects.filter(visit=instance).values_list("food_id", flat=True))
+    keys = {(f, instance.place_id) for f in food_ids} | {(f, old["place_id"]) for f in food_ids}
+    mark_food_place_dirty(keys)
@@ -0,0 +1,82 @@
+# foods/tests.py
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from categorization.models import PlaceType
+from places.models import Place
+from visits.models import Visit
+from .models import Food, FoodPlaceLatest, VisitFood
+from .name_index import FoodNameIndex, FoodNameIndexCache
+
+
+class FoodPlaceLatestDeleteTests(TestCase):
+    """Los VisitFood borrados en cascada no consultan su Place uno a uno."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ana", password="x")
+        cls.household = cls.user.profile.household
+        cls.place = Place.objects.create(
+            household=cls.household, name="Casa Pepe", place_type=PlaceType.objects.create(name="Restaurante")
+        )
+        cls.foods = [Food.objects.create(household=cls.household, name=f"Plato {i}") for i in range(5)]
+
+    def create_visit(self, foods):
+        with self.captureOnCommitCallbacks(execute=True):
+            visit = Visit.objects.create(
+                place=self.place, author=self.user.profile, date=datetime.date(2024, 5, 1), rating=Decimal("8")
+            )
+            for food in foods:
+                VisitFood.objects.create(visit=visit, food=food, rating=Decimal("7"))
+        return visit
+
+    def delete_visit(self, visit) -> list:
+        visit = Visit.objects.get(pk=visit.pk)
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            visit.delete()
+        return [query["sql"] for query in queries]
+
+    def test_cascade_delete_does_not_look_up_visits(self):
+        queries = self.delete_visit(self.create_visit(self.foods))
+        lookups = [sql for sql in queries if sql.startswith("SELECT") and 'FROM "visits_visit"' in sql]
+        self.assertEqual(lookups, [])
+
+    def test_cascade_delete_refreshes_latest(self):
+        older = self.create_visit(self.foods[:2])
+        newer = self.create_visit(self.foods[:1])
+        self.assertEqual(
+            FoodPlaceLatest.objects.get(food=self.foods[0], place=self.place).visit_food.visit_id, newer.pk
+        )
+
+        self.delete_visit(newer)
+
+        latest = FoodPlaceLatest.objects.get(food=self.foods[0], place=self.place)
+        self.assertEqual(latest.visit_food.visit_id, older.pk)
+        self.assertTrue(FoodPlaceLatest.objects.filter(food=self.foods[1], place=self.place).exists())
+
+
+class FoodNameIndexCacheTests(TestCase):
+
+    def test_index_invalidated_while_building_is_not_stored(self):
+        cache = FoodNameIndexCache()
+        stale = FoodNameIndex([], {})
+
+        def build(household_id):
+            cache.invalidate(household_id)  # on_commit de otra petición a mitad de la construcción
+            return stale
+
+        with mock.patch.object(FoodNameIndex, "build", side_effect=build):
+            self.assertIs(cache.get("hh"), stale)
+        self.assertNotIn("hh", cache.entries)
+
+        fresh = FoodNameIndex([], {})
+        with mock.patch.object(FoodNameIndex, "build", return_value=fresh):
+            self.assertIs(cache.get("hh"), fresh)
+            self.assertIs(cache.get("hh"), fresh)
+        self.assertIs(cache.entries["hh"], fresh)
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from rest_framework import viewsets
+
+from core.api import ConditionalGetMixin
 from .models import Area
 
 class AreaSerializer(serializers.ModelSerializer):
@@ -7,8 +9,9 @@ class AreaSerializer(serializers.ModelSerializer):
         model = Area
         fields = ["id", "name", "created_at"]
 
-class AreaViewSet(viewsets.ModelViewSet):
+class AreaViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Area.objects.all().order_by("name")
     serializer_class = AreaSerializer
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
     # No household filter (global)
+    # ETag/Last-Modified: COUNT + MAX(updated_at) del queryset filtrado
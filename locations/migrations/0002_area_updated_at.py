@@ -0,0 +1,27 @@
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_area_updated_at(apps, schema_editor):
+    """Las áreas existentes nunca se han modificado: updated_at = created_at."""
+    Area = apps.get_model("locations", "Area")
+    Area.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("locations", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="area",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_area_updated_at, migrations.RunPython.noop),
+    ]
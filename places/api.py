@@ -1,12 +1,50 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
+from django.db.models import Count, Prefetch
 from django_filters import rest_framework as filters
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.relations import MANY_RELATION_KWARGS
+from rest_framework.response import Response
 
 from core.api import HouseholdScopedViewSet
 from core.validators import validate_non_blank_trimmed
 from categorization.models import PlaceType, Tag
 from .models import Place, PlaceTag
+from .services import bulk_update_place_tags
+
+
+class ScopedPrimaryKeysField(serializers.ManyRelatedField):
+    """
+    Lista de PKs resuelta en una sola consulta contra el queryset (ya acotado) del
+    campo hijo. Los IDs que no existen o no están en el scope se reportan juntos.
+    """
+    default_error_messages = {
+        "not_found": "No existen o no pertenecen a tu household: {pks}.",
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        queryset = self.child_relation.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks, invalid = [], []
+        for item in data:
+            try:
+                pks.append(pk_field.to_python(item))
+            except (DjangoValidationError, TypeError, ValueError):
+                invalid.append(str(item))
+
+        pks = list(dict.fromkeys(pks))  # sin duplicados, en el orden recibido
+        found = queryset.in_bulk(pks) if pks else {}
+        invalid += [str(pk) for pk in pks if pk not in found]
+        if invalid:
+            self.fail("not_found", pks=", ".join(invalid))
+        return [found[pk] for pk in pks]
 
 
 class PlaceSerializer(serializers.ModelSerializer):
@@ -14,7 +52,22 @@ class PlaceSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(serializers.UUIDField())
     class TagsField(serializers.PrimaryKeyRelatedField):
-        pass
+        """Tags del household del usuario; con many=True, en una consulta."""
+
+        def get_queryset(self):
+            qs = super().get_queryset()
+            request = self.context.get("request")
+            if request and hasattr(request.user, "profile"):
+                qs = qs.filter(household_id=request.user.profile.household_id)
+            return qs
+
+        @classmethod
+        def many_init(cls, *args, **kwargs):
+            list_kwargs = {"child_relation": cls(*args, **kwargs)}
+            for key in kwargs:
+                if key in MANY_RELATION_KWARGS:
+                    list_kwargs[key] = kwargs[key]
+            return ScopedPrimaryKeysField(**list_kwargs)
 
     tags = TagsField(
         many=True,
@@ -56,7 +109,7 @@ class PlaceSerializer(serializers.ModelSerializer):
         """
         Validaciones de scope:
         - place_type debe ser global (household=None) o del mismo household del usuario
-        - tags deben ser globales (household=None) o del mismo household del usuario
+        - tags: globales o del household del usuario, ya comprobado por TagsField
         """
         request = self.context.get("request")
         if not request or not hasattr(request.user, "profile"):
@@ -72,53 +125,43 @@ class PlaceSerializer(serializers.ModelSerializer):
                         "place_type": "El tipo de lugar no pertenece a tu household (ni es global)."
                     })
 
-        tags = attrs.get("tags")
-        if tags is not None:
-            invalid_tags = []
-            for tag in tags:
-                if hasattr(tag, "household_id"):
-                    if tag.household_id is not None and tag.household_id != user_hh_id:
-                        invalid_tags.append(str(tag.pk))
-
-            if invalid_tags:
-                raise serializers.ValidationError({
-                    "tags": (
-                        "Uno o más tags no pertenecen a tu household (ni son globales). "
-                        f"Tags inválidos: {', '.join(invalid_tags)}"
-                    )
-                })
-
         return attrs
 
-    def _sync_tags(self, place: Place, tags) -> None:
+    def _sync_tags(self, place: Place, tags, current_tag_ids) -> None:
         """
         Sincroniza la tabla intermedia PlaceTag para que el Place tenga exactamente
-        los tags recibidos.
+        los tags recibidos. current_tag_ids son los que tiene ahora (ya cargados).
         """
         desired_tag_ids = {tag.pk for tag in tags}
-        current_tag_ids = set(
-            PlaceTag.objects.filter(place=place).values_list("tag_id", flat=True)
-        )
 
         tag_ids_to_create = desired_tag_ids - current_tag_ids
         tag_ids_to_delete = current_tag_ids - desired_tag_ids
 
         if tag_ids_to_delete:
-            PlaceTag.objects.filter(place=place, tag_id__in=tag_ids_to_delete).delete()
+            # place precargado: las señales de borrado lo leen en cada PlaceTag
+            PlaceTag.objects.filter(place=place, tag_id__in=tag_ids_to_delete).prefetch_related("place").delete()
 
         if tag_ids_to_create:
             PlaceTag.objects.bulk_create(
                 [PlaceTag(place=place, tag_id=tag_id) for tag_id in tag_ids_to_create]
             )
 
+    @staticmethod
+    def _current_tag_ids(place: Place) -> set:
+        """Tags actuales: del prefetch del viewset si lo hay; si no, una consulta."""
+        prefetched = getattr(place, "_prefetched_objects_cache", {}).get("tags")
+        if prefetched is not None:
+            return {tag.pk for tag in prefetched}
+        return set(PlaceTag.objects.filter(place=place).values_list("tag_id", flat=True))
+
     @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop("tags", None)
 
         place = super().create(validated_data)
 
-        if tags is not None:
-            self._sync_tags(place, tags)
+        if tags:
+            self._sync_tags(place, tags, set())
 
         return place
 
@@ -126,23 +169,58 @@ class PlaceSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         tags = validated_data.pop("tags", None)
 
+        current_tag_ids = self._current_tag_ids(instance) if tags is not None else None
         place = super().update(instance, validated_data)
 
         if tags is not None:
-            self._sync_tags(place, tags)
+            self._sync_tags(place, tags, current_tag_ids)
 
         return place
 
 
+class PlaceBulkTagsSerializer(serializers.Serializer):
+    place_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=1000)
+    add = PlaceSerializer.TagsField(many=True, queryset=Tag.objects.all(), required=False)
+    remove = PlaceSerializer.TagsField(many=True, queryset=Tag.objects.all(), required=False)
+
+    def validate(self, attrs):
+        add = {tag.pk for tag in attrs.get("add", [])}
+        remove = {tag.pk for tag in attrs.get("remove", [])}
+        if not add and not remove:
+            raise serializers.ValidationError("Indica algún tag en add o remove.")
+        if add & remove:
+            raise serializers.ValidationError({"remove": "Un tag no puede estar en add y en remove a la vez."})
+
+        place_ids = set(attrs["place_ids"])
+        found = set(
+            Place.objects.filter(household_id=self.context["household_id"], id__in=place_ids)
+            .values_list("id", flat=True)
+        )
+        missing = ", ".join(sorted(str(pk) for pk in place_ids - found))
+        if missing:
+            raise serializers.ValidationError({"place_ids": f"No existen o no pertenecen a tu household: {missing}."})
+        return {"place_ids": place_ids, "add": add, "remove": remove}
+
+
 class CharInFilter(filters.BaseInFilter, filters.CharFilter):
     pass
 
 
+class UUIDInFilter(filters.BaseInFilter, filters.UUIDFilter):
+    pass
+
+
 class PlaceFilter(filters.FilterSet):
     min_avg_rating = filters.NumberFilter(field_name="avg_rating", lookup_expr="gte")
     max_avg_price_pp = filters.NumberFilter(field_name="avg_price_pp", lookup_expr="lte")
     price_range_in = CharInFilter(field_name="price_range", lookup_expr="in")
 
+    # ?tags_any=a,b (alguno) · ?tags_all=a,b (todos) · ?tags_none=a,b (ninguno).
+    # Subconsultas sobre PlaceTag que se resuelven con el índice (tag, place).
+    tags_any = UUIDInFilter(method="filter_tags_any", help_text="IDs de tags: el lugar tiene alguno.")
+    tags_all = UUIDInFilter(method="filter_tags_all", help_text="IDs de tags: el lugar los tiene todos.")
+    tags_none = UUIDInFilter(method="filter_tags_none", help_text="IDs de tags: el lugar no tiene ninguno.")
+
     class Meta:
         model = Place
         fields = [
@@ -152,8 +230,38 @@ class PlaceFilter(filters.FilterSet):
             "price_range_in",
             "min_avg_rating",
             "max_avg_price_pp",
+            "tags_any",
+            "tags_all",
+            "tags_none",
         ]
 
+    @staticmethod
+    def _places_with_tags(tag_ids):
+        return PlaceTag.objects.filter(tag_id__in=tag_ids).values("place_id")
+
+    def filter_tags_any(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(id__in=self._places_with_tags(set(value)))
+
+    def filter_tags_all(self, queryset, name, value):
+        if not value:
+            return queryset
+        # Intersección en una sola agrupación: places con los n tags (unique place+tag)
+        tag_ids = set(value)
+        having_all = (
+            self._places_with_tags(tag_ids)
+            .annotate(matched=Count("tag_id"))
+            .filter(matched=len(tag_ids))
+            .values("place_id")
+        )
+        return queryset.filter(id__in=having_all)
+
+    def filter_tags_none(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.exclude(id__in=self._places_with_tags(set(value)))
+
 
 class PlaceViewSet(HouseholdScopedViewSet):
     queryset = Place.objects.all().order_by("-last_visit_at", "name")
@@ -161,5 +269,31 @@ class PlaceViewSet(HouseholdScopedViewSet):
     filterset_class = PlaceFilter
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
 
+    # Solo si la respuesta incluye tags, y solo sus IDs (en el mismo orden que el
+    # modo rápido de list, que los lee de PlaceTag sin JOIN)
+    sparse_prefetch = {"tags": (Prefetch("tags", queryset=Tag.objects.only("id").order_by("pk")),)}
+    fast_list = True
+
     search_fields = ["name"]
-    ordering_fields = ["avg_rating", "avg_price_pp", "last_visit_at", "name"]
\ No newline at end of file
+    ordering_fields = ["avg_rating", "avg_price_pp", "last_visit_at", "name"]
+
+    @action(detail=False, methods=["post"], url_path="bulk-tags")
+    def bulk_tags(self, request):
+        """
+        POST /places/bulk-tags/  {"place_ids": [...], "add": [tag_id, ...], "remove": [tag_id, ...]}
+        Añade y quita tags en muchos Places a la vez, con el scope validado una sola vez
+        y un INSERT / DELETE / UPDATE en total en lugar de un PATCH por Place.
+        """
+        household_id = request.user.profile.household_id
+        ser = PlaceBulkTagsSerializer(
+            data=request.data, context={**self.get_serializer_context(), "household_id": household_id}
+        )
+        ser.is_valid(raise_exception=True)
+        result = bulk_update_place_tags(
+            household_id, ser.validated_data["place_ids"], ser.validated_data["add"], ser.validated_data["remove"]
+        )
+        return Response({
+            "added": result["added"],
+            "removed": result["removed"],
+            "places": sorted(str(pk) for pk in result["places"]),
+        })
\ No newline at end of file
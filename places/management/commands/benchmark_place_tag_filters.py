@@ -0,0 +1,107 @@
+# places/management/commands/benchmark_place_tag_filters.py
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from accounts.models import Household
+from categorization.models import PlaceType, Tag
+from places.api import PlaceFilter
+from places.models import Place, PlaceTag
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide los filtros tags_any/tags_all/tags_none de /places/ sobre datos sintéticos "
+        "(por defecto 10k places × 50 tags) frente a la alternativa con un JOIN por tag. "
+        "Los datos se crean en una transacción que se deshace al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--places", type=int, default=10_000)
+        parser.add_argument("--tags", type=int, default=50)
+        parser.add_argument("--tags-per-place", type=int, default=6)
+        parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por medida (se queda la mejor).")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **opts):
+        if opts["tags_per_place"] > opts["tags"]:
+            raise CommandError("--tags-per-place no puede ser mayor que --tags.")
+        try:
+            with transaction.atomic():
+                self._run(opts)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, opts):
+        rnd = random.Random(opts["seed"])
+        household = Household.objects.create(name="benchmark")
+        place_type = PlaceType.objects.create(household=household, name="benchmark")
+        tags = Tag.objects.bulk_create(
+            [Tag(household=household, name=f"tag-{i}") for i in range(opts["tags"])]
+        )
+        places = Place.objects.bulk_create(
+            [Place(household=household, place_type=place_type, name=f"place-{i}") for i in range(opts["places"])],
+            batch_size=2000,
+        )
+        PlaceTag.objects.bulk_create(
+            [PlaceTag(place=p, tag=t) for p in places for t in rnd.sample(tags, opts["tags_per_place"])],
+            batch_size=5000,
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE places_place")
+                cursor.execute("ANALYZE places_placetag")
+        self.stdout.write(
+            f"{opts['places']} places, {opts['tags']} tags, {opts['tags_per_place']} tags por place ({connection.vendor})"
+        )
+
+        base = Place.objects.filter(household=household)
+        picked = [str(t.id) for t in rnd.sample(tags, 3)]
+        cases = [
+            ("tags_any (3)", {"tags_any": ",".join(picked)}, base.filter(tags__in=picked).distinct()),
+            ("tags_all (2)", {"tags_all": ",".join(picked[:2])}, self._joins(base, picked[:2])),
+            ("tags_all (3)", {"tags_all": ",".join(picked)}, self._joins(base, picked)),
+            ("tags_none (3)", {"tags_none": ",".join(picked)}, base.exclude(tags__in=picked)),
+            (
+                "tags_all (2) + price_range",
+                {"tags_all": ",".join(picked[:2]), "price_range": "€"},
+                self._joins(base.filter(price_range="€"), picked[:2]),
+            ),
+        ]
+        for label, params, naive in cases:
+            fs = PlaceFilter(params, queryset=base)
+            if not fs.is_valid():
+                raise CommandError(fs.errors)
+            filtered, filtered_time = self._measure(lambda: set(fs.qs.values_list("id", flat=True)), opts["repeat"])
+            expected, naive_time = self._measure(lambda: set(naive.values_list("id", flat=True)), opts["repeat"])
+            if filtered != expected:
+                raise CommandError(f"{label}: los resultados no coinciden.")
+            self.stdout.write(
+                f"{label:<28} {len(filtered):>6} filas  filtro {filtered_time * 1000:8.2f} ms  "
+                f"joins {naive_time * 1000:8.2f} ms"
+            )
+
+    @staticmethod
+    def _joins(qs, tag_ids):
+        """Alternativa ingenua: un JOIN con PlaceTag por cada tag."""
+        for tag_id in tag_ids:
+            qs = qs.filter(Q(tags=tag_id))
+        return qs
+
+    @staticmethod
+    def _measure(fn, repeat):
+        best, result = None, None
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.25 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("places", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="place",
+            name="price_sum",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name="place",
+            name="priced_visits_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="place",
+            name="rating_sum",
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=12),
+        ),
+    ]
@@ -42,6 +42,11 @@ class Place(models.Model):
     visits_count = models.PositiveIntegerField(default=0)
     last_visit_at = models.DateTimeField(null=True, blank=True)
 
+    # Acumulados para mantener las medias con deltas O(1) (ver visits.services)
+    rating_sum = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    priced_visits_count = models.PositiveIntegerField(default=0)
+    price_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -0,0 +1,40 @@
+# places/services.py
+from django.db import transaction
+from django.utils import timezone
+
+from core.generations import record_changes
+from .models import Place, PlaceTag
+
+
+@transaction.atomic
+def bulk_update_place_tags(household_id, place_ids, add_tag_ids=(), remove_tag_ids=()) -> dict:
+    """
+    Añade add_tag_ids y quita remove_tag_ids en varios Places (ya validados contra
+    el household): una lectura de los PlaceTag existentes, un INSERT (ignore_conflicts),
+    un DELETE y un UPDATE de updated_at solo en los Places que han cambiado. El DELETE
+    va por QuerySet.delete(), que lanza las señales de cada PlaceTag borrado.
+    """
+    place_ids, add_tag_ids, remove_tag_ids = set(place_ids), set(add_tag_ids), set(remove_tag_ids)
+    existing = set(
+        PlaceTag.objects.filter(place_id__in=place_ids, tag_id__in=add_tag_ids | remove_tag_ids)
+        .values_list("place_id", "tag_id")
+    )
+    to_create = [
+        PlaceTag(place_id=place_id, tag_id=tag_id)
+        for place_id in place_ids
+        for tag_id in add_tag_ids
+        if (place_id, tag_id) not in existing
+    ]
+    to_delete = {(place_id, tag_id) for place_id, tag_id in existing if tag_id in remove_tag_ids}
+
+    if to_create:
+        PlaceTag.objects.bulk_create(to_create, batch_size=1000, ignore_conflicts=True)
+    if to_delete:
+        PlaceTag.objects.filter(place_id__in={p for p, _ in to_delete}, tag_id__in=remove_tag_ids).delete()
+
+    changed = {obj.place_id for obj in to_create} | {place_id for place_id, _ in to_delete}
+    if changed:
+        Place.objects.filter(id__in=changed).update(updated_at=timezone.now())
+        # Los tags viajan dentro del Place
+        record_changes(household_id, [("places.Place", place_id, False) for place_id in changed])
+    return {"added": len(to_create), "removed": len(to_delete), "places": changed}
@@ -0,0 +1,107 @@
+# places/tests.py
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from accounts.models import Household
+from categorization.models import PlaceType, Tag
+from core.pagination import PageOrCursorPagination
+from locations.models import Area
+from .models import Place, PlaceTag
+
+
+PLACES_URL = "/api/v1/places/"
+
+
+@override_settings(RESPONSE_CACHE=None)
+class PlaceListQueriesTests(APITestCase):
+    """El listado de Places hace las mismas consultas sea cual sea el tamaño de página."""
+
+    page_sizes = (1, 5, 20)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ana", password="x")
+        household = cls.user.profile.household
+        place_type = PlaceType.objects.create(name="Restaurante")
+        area = Area.objects.create(name="Centro")
+        tags = [Tag.objects.create(household=household, name=name) for name in ("tapas", "terraza", "veg")]
+        places = [
+            Place.objects.create(household=household, name=f"Place {i:02}", place_type=place_type, area=area)
+            for i in range(max(cls.page_sizes) + 5)
+        ]
+        PlaceTag.objects.bulk_create(PlaceTag(place=place, tag=tag) for place in places for tag in tags)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def assert_constant_queries(self, query):
+        with CaptureQueriesContext(connection) as baseline:
+            self._list(self.page_sizes[0], query)
+        for page_size in self.page_sizes[1:]:
+            with self.subTest(page_size=page_size), self.assertNumQueries(len(baseline)):
+                results = self._list(page_size, query)
+            self.assertEqual(len(results), page_size)
+            self.assertTrue(all(len(place["tags"]) == 3 for place in results))
+
+    def _list(self, page_size, query):
+        with mock.patch.object(PageOrCursorPagination, "page_size", page_size):
+            response = self.client.get(PLACES_URL, query)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_fast_list(self):
+        self.assert_constant_queries({})
+
+    def test_fast_list_sparse_fields(self):
+        self.assert_constant_queries({"fields": "id,name,tags"})
+
+    def test_sparse_fields_use_maintained_count(self):
+        # ?fields= no filtra: el total sale del contador del household, sin COUNT(*)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(PLACES_URL, {"fields": "id,name", "omit": "tags"})
+        self.assertEqual(response.json()["count"], Place.objects.count())
+        self.assertFalse(any("COUNT(" in query["sql"].upper() for query in queries))
+
+    def test_cursor_pagination(self):
+        # ?cursor= no usa el camino rápido: instancias, serializer y prefetch de los tags
+        self.assert_constant_queries({"cursor": ""})
+
+
+class PlaceTagsTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("ana", password="x")
+        household = self.user.profile.household
+        place_type = PlaceType.objects.create(name="Restaurante")
+        self.tags = [Tag.objects.create(household=household, name=name) for name in ("tapas", "terraza")]
+        self.places = [
+            Place.objects.create(household=household, name=name, place_type=place_type) for name in ("A", "B")
+        ]
+        PlaceTag.objects.create(place=self.places[0], tag=self.tags[0])
+        self.client.force_authenticate(self.user)
+
+    def test_add_and_remove(self):
+        response = self.client.post(f"{PLACES_URL}bulk-tags/", {
+            "place_ids": [str(place.pk) for place in self.places],
+            "add": [str(self.tags[1].pk)],
+            "remove": [str(self.tags[0].pk)],
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["added"], response.json()["removed"]), (2, 1))
+        self.assertEqual(
+            set(PlaceTag.objects.values_list("place_id", "tag_id")),
+            {(place.pk, self.tags[1].pk) for place in self.places},
+        )
+
+    def test_tags_from_another_household_are_rejected(self):
+        foreign = Tag.objects.create(household=Household.objects.create(name="Otra casa"), name="ajena")
+        response = self.client.patch(
+            f"{PLACES_URL}{self.places[0].pk}/", {"tags": [str(foreign.pk)]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(foreign.pk), response.json()["tags"][0])
@@ -5,6 +5,9 @@ from django_filters import rest_framework as filters
 from django.db import transaction
 
 from core.api import HouseholdScopedViewSet
+from core.counters import bump_household_counts
+from core.generations import record_objects
+from core.search import index_objects
 from core.validators import (
     validate_rating_1_to_10,
     validate_price_non_negative,
@@ -12,7 +15,9 @@ from core.validators import (
 )
 from .models import Visit
 from places.models import Place
-from foods.models import Food, VisitFood
+from foods.models import VisitFood
+from foods.name_index import match_food_names
+from foods.services import foods_by_id, get_or_create_foods_by_name, mark_food_place_dirty
 
 
 # ============================================================
@@ -28,8 +33,8 @@ class VisitSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Visit
-        fields = ["id", "place", "author", "date", "rating", "price_per_person", "comment", "created_at"]
-        read_only_fields = ["author", "created_at"]
+        fields = ["id", "place", "author", "date", "rating", "price_per_person", "comment", "created_at", "updated_at"]
+        read_only_fields = ["author", "created_at", "updated_at"]
 
     def validate(self, attrs):
         """
@@ -46,6 +51,27 @@ class VisitSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class VisitFoodItemSerializer(serializers.Serializer):
+    """
+    Cada plato del endpoint compuesto: por ID existente ("food") o por nombre ("name").
+    Los items sin ninguno de los dos se ignoran.
+    """
+    food = serializers.UUIDField(required=False, allow_null=True)
+    name = serializers.CharField(max_length=120, required=False, allow_blank=True, trim_whitespace=False)
+    rating = serializers.DecimalField(
+        max_digits=3, decimal_places=1, required=False, allow_null=True,
+        validators=[validate_rating_1_to_10]
+    )
+    price_paid = serializers.DecimalField(
+        max_digits=7, decimal_places=2, required=False, allow_null=True,
+        validators=[validate_price_non_negative]
+    )
+    comment = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_name(self, value):
+        return validate_non_blank_trimmed(value) if value else value
+
+
 class VisitCreateWithFoodsSerializer(serializers.Serializer):
     """
     Serializer de entrada para el endpoint compuesto.
@@ -59,7 +85,10 @@ class VisitCreateWithFoodsSerializer(serializers.Serializer):
         validators=[validate_price_non_negative]
     )
     comment = serializers.CharField(required=False, allow_blank=True)
-    foods = serializers.ListField(child=serializers.DictField(), required=False)
+    foods = VisitFoodItemSerializer(many=True, required=False)
+    # "fuzzy": los nombres sin un Food igual se asignan al más parecido del catálogo
+    # (erratas, acentos) en vez de crear uno nuevo
+    food_matching = serializers.ChoiceField(choices=["exact", "fuzzy"], default="exact")
 
     def validate(self, attrs):
         """
@@ -99,6 +128,7 @@ class VisitViewSet(HouseholdScopedViewSet):
     serializer_class = VisitSerializer
     filterset_class = VisitFilter
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
+    fast_list = True
 
     search_fields = ["place__name", "comment"]  # buscar por nombre del sitio o comentario
     ordering_fields = ["date", "created_at", "rating", "price_per_person"]
@@ -117,65 +147,103 @@ class VisitViewSet(HouseholdScopedViewSet):
           "foods": [
             {"name": "Tarta de queso", "rating": 9.5, "price_paid": 6.5},
             {"food": "uuid-food-existente", "rating": 8.0}
-          ]
+          ],
+          "food_matching": "fuzzy"   // opcional; por defecto "exact"
         }
+        Con "fuzzy", los nombres sin un Food igual se asignan al más parecido del
+        catálogo si lo hay, y la respuesta incluye "foods": {"matched": [...], "created": [...]}.
         """
         s = VisitCreateWithFoodsSerializer(data=request.data, context={"request": request})
         s.is_valid(raise_exception=True)
         data = s.validated_data
 
-        user = request.user
-        hh = user.profile.household
+        profile = request.user.profile
+        hh_id = profile.household_id
 
-        # 1) Crear la visita (el modelo pone date=hoy si no se pasa)
+        # Items válidos (ignoramos los que no traen ni food ni name)
+        items = [item for item in data.get("foods", []) or [] if item.get("food") or item.get("name")]
+
+        # 1) Resolver todos los foods antes de escribir nada:
+        #    IDs en una consulta; nombres en una consulta + un bulk_create
+        by_id = foods_by_id(hh_id, [item["food"] for item in items if item.get("food")])
+        if any(item.get("food") and item["food"] not in by_id for item in items):
+            return Response(
+                {"detail": "El food indicado no existe o pertenece a otro household."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        names = [item["name"] for item in items if not item.get("food")]
+        matched = {}
+        if data["food_matching"] == "fuzzy":
+            # Parecidos en el índice en memoria; los Foods se releen en una consulta
+            hits = match_food_names(hh_id, names)
+            found = foods_by_id(hh_id, {food_id for food_id, _ in hits.values()})
+            matched = {name: (found[food_id], score) for name, (food_id, score) in hits.items() if food_id in found}
+        created = set()
+        by_name = get_or_create_foods_by_name(hh_id, [n for n in names if n not in matched], created)
+        for name, (food, _) in matched.items():
+            by_name.setdefault(name.lower(), food)
+
+        # 2) Crear la visita (si no viene fecha, el modelo pone hoy)
+        visit_fields = {"date": data["date"]} if data.get("date") else {}
         visit = Visit.objects.create(
-            place_id=str(data["place"]),
-            author=user.profile,
-            date=data.get("date") or None,
+            place_id=data["place"],
+            household_id=hh_id,
+            author=profile,
             rating=data["rating"],
             price_per_person=data.get("price_per_person"),
             comment=(data.get("comment") or "").strip(),
+            **visit_fields,
         )
 
-        # 2) Crear los VisitFood (opcionales)
-        items = data.get("foods", []) or []
-        for item in items:
-            food_obj = None
-
-            # (a) Por ID existente
-            if "food" in item and item["food"]:
-                food_obj = Food.objects.filter(id=item["food"], household=hh).first()
-                if not food_obj:
-                    return Response(
-                        {"detail": "El food indicado no existe o pertenece a otro household."},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-            # (b) Por nombre nuevo
-            elif "name" in item and item["name"]:
-                name = validate_non_blank_trimmed(item["name"])
-                food_obj, _ = Food.objects.get_or_create(household=hh, name=name)
-
-            else:
-                continue  # ignorar si no trae ni food ni name
-
-            # Validaciones de rating y precio
-            vf_rating = item.get("rating")
-            if vf_rating is not None:
-                validate_rating_1_to_10(vf_rating)
-            else:
-                vf_rating = data["rating"]
-
-            price_paid = item.get("price_paid")
-            validate_price_non_negative(price_paid)
-
-            VisitFood.objects.create(
+        # 3) Todos los VisitFood en un único INSERT
+        visit_foods = VisitFood.objects.bulk_create([
+            VisitFood(
                 visit=visit,
-                food=food_obj,
-                rating=vf_rating,
-                price_paid=price_paid,
+                household_id=hh_id,
+                food=by_id[item["food"]] if item.get("food") else by_name[item["name"].lower()],
+                rating=item["rating"] if item.get("rating") is not None else data["rating"],
+                price_paid=item.get("price_paid"),
                 comment=(item.get("comment") or "").strip(),
             )
+            for item in items
+        ])
+        # bulk_create no lanza señales: refrescar FoodPlaceLatest (una vez, en on_commit)
+        # y el contador de VisitFoods del household
+        mark_food_place_dirty({(vf.food_id, visit.place_id) for vf in visit_foods})
+        bump_household_counts(visit_foods)
+        record_objects([*visit_foods, *by_name.values()])
+        index_objects(visit_foods)
+
+        # Las métricas del Place ya las ha actualizado la señal de Visit (un delta)
+        body = {"visit_id": str(visit.id)}
+        if data["food_matching"] == "fuzzy":
+            body["foods"] = {
+                "matched": [
+                    {"name": name, "food": str(food.id), "food_name": food.name, "similarity": score}
+                    for name, (food, score) in matched.items()
+                ],
+                "created": [
+                    {"name": by_name[key].name, "food": str(by_name[key].id)} for key in sorted(created)
+                ],
+            }
+        return Response(body, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_ndjson(self, request):
+        """
+        Importación masiva de visitas históricas.
+        Body NDJSON (Content-Type: application/x-ndjson), una visita por línea:
+          {"place_name": "Casa Pepe", "date": "2023-05-01", "rating": 8, "foods": [{"name": "Croquetas"}]}
+          {"place": "uuid-lugar", "rating": 7.5, "place_tags": ["terraza"]}
+        Se lee en streaming y se inserta por lotes (?batch_size=, por defecto 500).
+        Devuelve el recuento de filas creadas y los errores por nº de línea.
+        """
+        from .imports import VisitImporter  # importa serializers de este módulo
+
+        try:
+            batch_size = min(max(int(request.query_params.get("batch_size", 500)), 1), 5000)
+        except ValueError:
+            batch_size = 500
 
-        # Las señales de Visit recalculan métricas del Place
-        return Response({"visit_id": str(visit.id)}, status=status.HTTP_201_CREATED)
+        report = VisitImporter(request.user.profile, batch_size=batch_size).run(request.stream or [])
+        return Response(report, status=status.HTTP_200_OK)
@@ -0,0 +1,226 @@
+# visits/imports.py
+import json
+
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
+from rest_framework import serializers
+
+from core.validators import (
+    validate_rating_1_to_10,
+    validate_price_non_negative,
+    validate_non_blank_trimmed,
+)
+from categorization.services import get_or_create_tags_by_name
+from core.counters import bump_household_counts
+from core.generations import record_changes, record_objects
+from core.search import index_objects
+from foods.models import VisitFood
+from foods.services import foods_by_id, get_or_create_foods_by_name, mark_food_place_dirty
+from places.models import Place, PlaceTag
+from .api import VisitFoodItemSerializer
+from .models import Visit
+from .services import defer_place_metrics, mark_place_dirty
+
+
+class VisitImportLineSerializer(serializers.Serializer):
+    """
+    Una línea del NDJSON: una visita con sus platos.
+    El lugar se indica por ID ("place") o por nombre exacto, sin distinguir
+    mayúsculas ("place_name"). "place_tags" añade tags (por nombre) al lugar.
+    """
+    place = serializers.UUIDField(required=False)
+    place_name = serializers.CharField(max_length=200, required=False, validators=[validate_non_blank_trimmed])
+    place_tags = serializers.ListField(
+        child=serializers.CharField(max_length=60, validators=[validate_non_blank_trimmed]),
+        required=False,
+    )
+    date = serializers.DateField(required=False)
+    rating = serializers.DecimalField(max_digits=3, decimal_places=1, validators=[validate_rating_1_to_10])
+    price_per_person = serializers.DecimalField(
+        max_digits=7, decimal_places=2, required=False, allow_null=True,
+        validators=[validate_price_non_negative]
+    )
+    comment = serializers.CharField(required=False, allow_blank=True)
+    foods = VisitFoodItemSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        if not attrs.get("place") and not attrs.get("place_name"):
+            raise serializers.ValidationError({"place": "Indica 'place' (ID) o 'place_name'."})
+        return attrs
+
+
+AMBIGUOUS = object()
+
+
+class VisitImporter:
+    """
+    Importa visitas históricas desde líneas NDJSON, por lotes:
+    - Parseo y validación línea a línea (los errores se reportan con su nº de línea).
+    - Por lote: Places/Foods/Tags se resuelven con una consulta por tipo, cacheando
+      lo ya visto para los lotes siguientes; Visit, VisitFood y PlaceTag con bulk_create.
+    - Las métricas de cada Place se recalculan una sola vez al final.
+    """
+
+    def __init__(self, profile, batch_size=500):
+        self.profile = profile
+        self.household_id = profile.household_id
+        self.batch_size = batch_size
+
+        self.places_by_id = {}
+        self.places_by_name = {}
+        self.foods_by_id = {}
+        self.foods_by_name = {}
+        self.tags_by_name = {}
+
+        self.report = {"lines": 0, "visits_created": 0, "visit_foods_created": 0, "errors": []}
+
+    def run(self, lines) -> dict:
+        with defer_place_metrics():
+            batch = []
+            for number, raw in enumerate(lines, start=1):
+                raw = raw.strip()
+                if not raw:
+                    continue
+                self.report["lines"] += 1
+
+                try:
+                    payload = json.loads(raw)
+                except ValueError:
+                    self._error(number, {"detail": "JSON inválido."})
+                    continue
+
+                s = VisitImportLineSerializer(data=payload)
+                if not s.is_valid():
+                    self._error(number, s.errors)
+                    continue
+
+                batch.append((number, s.validated_data))
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch = []
+            if batch:
+                self._flush(batch)
+        self.report["errors"].sort(key=lambda e: e["line"])
+        return self.report
+
+    def _error(self, number, errors):
+        self.report["errors"].append({"line": number, "errors": errors})
+
+    # -------- resolución con caché --------
+
+    def _load_places(self, batch):
+        ids = {d["place"] for _, d in batch if d.get("place")} - self.places_by_id.keys()
+        if ids:
+            for p in Place.objects.filter(household_id=self.household_id, id__in=ids):
+                self.places_by_id[p.id] = p
+
+        wanted = {}
+        for _, d in batch:
+            if not d.get("place") and d["place_name"].lower() not in self.places_by_name:
+                wanted.setdefault(d["place_name"].lower(), d["place_name"])
+        if wanted:
+            # LOWER en los dos lados, en la BD (ver get_or_create_foods_by_name)
+            qs = Place.objects.annotate(lname=Lower("name")).filter(
+                household_id=self.household_id, lname__in=[Lower(Value(name)) for name in wanted.values()]
+            )
+            for p in qs:
+                key = p.name.lower()
+                # El mismo nombre en varias áreas: no sabemos cuál es
+                self.places_by_name[key] = AMBIGUOUS if key in self.places_by_name else p
+            for key in wanted.keys() - self.places_by_name.keys():
+                self.places_by_name[key] = None
+
+    def _place_for(self, data):
+        if data.get("place"):
+            return self.places_by_id.get(data["place"])
+        return self.places_by_name.get(data["place_name"].lower())
+
+    def _flush(self, batch):
+        # 1) Sin escribir nada: lugar y foods por ID; descartar líneas con errores
+        self._load_places(batch)
+        food_ids = {
+            item["food"] for _, d in batch for item in d.get("foods", []) if item.get("food")
+        } - self.foods_by_id.keys()
+        self.foods_by_id.update(foods_by_id(self.household_id, food_ids))
+
+        valid = []
+        for number, data in batch:
+            place = self._place_for(data)
+            if place is AMBIGUOUS:
+                self._error(number, {"place_name": "Hay varios lugares con ese nombre; usa 'place' (ID)."})
+                continue
+            if place is None:
+                self._error(number, {"place": "El lugar indicado no existe en tu household."})
+                continue
+            items = [i for i in data.get("foods", []) if i.get("food") or i.get("name")]
+            if any(i.get("food") and i["food"] not in self.foods_by_id for i in items):
+                self._error(number, {"foods": "El food indicado no existe o pertenece a otro household."})
+                continue
+            valid.append((place, data, items))
+
+        if not valid:
+            return
+
+        with transaction.atomic():
+            # 2) Foods y tags nuevos por nombre (una consulta + un bulk_create cada uno)
+            food_names = {
+                i["name"] for _, _, items in valid for i in items if not i.get("food")
+                if i["name"].lower() not in self.foods_by_name
+            }
+            new_foods = get_or_create_foods_by_name(self.household_id, food_names)
+            self.foods_by_name.update(new_foods)
+
+            tag_names = {
+                t for _, d, _ in valid for t in d.get("place_tags", [])
+                if t.lower() not in self.tags_by_name
+            }
+            new_tags = get_or_create_tags_by_name(self.household_id, tag_names)
+            self.tags_by_name.update(new_tags)
+
+            # 3) Inserciones por lotes
+            visits, visit_foods, place_tags = [], [], []
+            for place, data, items in valid:
+                visit_fields = {"date": data["date"]} if data.get("date") else {}
+                visit = Visit(
+                    place=place,
+                    household_id=self.household_id,
+                    author=self.profile,
+                    rating=data["rating"],
+                    price_per_person=data.get("price_per_person"),
+                    comment=(data.get("comment") or "").strip(),
+                    **visit_fields,
+                )
+                visits.append(visit)
+                for item in items:
+                    visit_foods.append(VisitFood(
+                        visit=visit,
+                        household_id=self.household_id,
+                        food=(
+                            self.foods_by_id[item["food"]] if item.get("food")
+                            else self.foods_by_name[item["name"].lower()]
+                        ),
+                        rating=item["rating"] if item.get("rating") is not None else data["rating"],
+                        price_paid=item.get("price_paid"),
+                        comment=(item.get("comment") or "").strip(),
+                    ))
+                for name in data.get("place_tags", []):
+                    place_tags.append(PlaceTag(place=place, tag=self.tags_by_name[name.lower()]))
+
+            Visit.objects.bulk_create(visits)
+            VisitFood.objects.bulk_create(visit_foods)
+            if place_tags:
+                PlaceTag.objects.bulk_create(place_tags, ignore_conflicts=True)
+            mark_food_place_dirty({(vf.food_id, vf.visit.place_id) for vf in visit_foods})
+            bump_household_counts(visits)
+            bump_household_counts(visit_foods)
+            # Sincronización y caché (las métricas de los Places se apuntan al recalcularlas)
+            record_objects([*visits, *visit_foods, *new_foods.values(), *new_tags.values()])
+            record_changes(self.household_id, [("places.Place", pid, False) for pid in {pt.place_id for pt in place_tags}])
+            index_objects(visits)
+            index_objects(visit_foods)
+
+        # bulk_create no lanza señales: se apuntan los Places para el recálculo final
+        mark_place_dirty(*{place.id for place, _, _ in valid})
+        self.report["visits_created"] += len(visits)
+        self.report["visit_foods_created"] += len(visit_foods)
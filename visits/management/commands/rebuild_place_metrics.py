@@ -0,0 +1,149 @@
+# visits/management/commands/rebuild_place_metrics.py
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from places.models import Place
+from visits.models import Visit
+from visits.services import place_metric_aggregates, rebuild_place_metrics_bulk
+
+
+QUANTIZE = {
+    "avg_rating": Decimal("0.1"),
+    "avg_price_pp": Decimal("0.01"),
+    "rating_sum": Decimal("0.1"),
+    "price_sum": Decimal("0.01"),
+}
+
+
+def _iter_place_chunks(household_id, chunk_size):
+    """IDs de los Places de un household en lotes, paginando por id (keyset)."""
+    qs = Place.objects.filter(household_id=household_id).order_by("id")
+    last_id = None
+    while True:
+        page = qs if last_id is None else qs.filter(id__gt=last_id)
+        ids = list(page.values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def _normalize(field, value):
+    if value is None:
+        return None
+    if field in QUANTIZE:
+        return Decimal(str(value)).quantize(QUANTIZE[field])
+    return value
+
+
+def _diff_chunk(place_ids):
+    """Diferencias (place_id, campo, actual, esperado) sin escribir nada."""
+    fields = list(place_metric_aggregates())
+    expected = {
+        row["place_id"]: row
+        for row in Visit.objects.filter(place_id__in=place_ids)
+        .values("place_id")
+        .annotate(**place_metric_aggregates())
+        .order_by()
+    }
+    empty = {"visits_count": 0, "rating_sum": Decimal("0"), "priced_visits_count": 0, "price_sum": Decimal("0")}
+
+    diffs = []
+    for current in Place.objects.filter(id__in=place_ids).values("id", *fields):
+        target = expected.get(current["id"], empty)
+        for f in fields:
+            old, new = _normalize(f, current[f]), _normalize(f, target.get(f))
+            if old != new:
+                diffs.append((current["id"], f, old, new))
+    return diffs
+
+
+def rebuild_households(household_ids, chunk_size, dry_run):
+    """Trabajo de un worker: reconstruye (o compara) los Places de varios households."""
+    stats = {"places": 0, "chunks": 0, "updated": 0, "diffs": []}
+    for household_id in household_ids:
+        for place_ids in _iter_place_chunks(household_id, chunk_size):
+            stats["chunks"] += 1
+            stats["places"] += len(place_ids)
+            if dry_run:
+                stats["diffs"].extend(_diff_chunk(place_ids))
+            else:
+                stats["updated"] += rebuild_place_metrics_bulk(place_ids)
+    connections.close_all()
+    return stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula avg_rating, avg_price_pp, visits_count y last_visit_at de los Places "
+        "con agregados agrupados y UPDATE ... FROM por lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--household", help="Limitar a un household (UUID).")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Places por lote (default 500).")
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Procesos en paralelo; el trabajo se reparte por household.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="No escribe: muestra las diferencias entre lo guardado y lo recalculado.",
+        )
+
+    def handle(self, *args, **opts):
+        chunk_size = opts["chunk_size"]
+        workers = opts["workers"]
+        dry_run = opts["dry_run"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size debe ser >= 1")
+        if workers < 1:
+            raise CommandError("--workers debe ser >= 1")
+
+        households = Place.objects.order_by().values_list("household_id", flat=True).distinct()
+        if opts["household"]:
+            households = households.filter(household_id=opts["household"])
+        households = list(households)
+        if not households:
+            self.stdout.write("No hay places que procesar.")
+            return
+
+        # Reparto round-robin de households entre workers
+        workers = min(workers, len(households))
+        buckets = [households[i::workers] for i in range(workers)]
+
+        started = time.monotonic()
+        if workers == 1:
+            results = [rebuild_households(buckets[0], chunk_size, dry_run)]
+        else:
+            # Los procesos hijos no deben heredar conexiones abiertas
+            connections.close_all()
+            ctx = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                futures = [pool.submit(rebuild_households, b, chunk_size, dry_run) for b in buckets]
+                results = [f.result() for f in futures]
+        elapsed = time.monotonic() - started
+
+        places = sum(r["places"] for r in results)
+        chunks = sum(r["chunks"] for r in results)
+
+        if dry_run:
+            diffs = [d for r in results for d in r["diffs"]]
+            for place_id, field, old, new in diffs:
+                self.stdout.write(f"{place_id} {field}: {old} -> {new}")
+            changed = len({d[0] for d in diffs})
+            self.stdout.write(f"[dry-run] {changed} places con diferencias ({len(diffs)} campos).")
+        else:
+            updated = sum(r["updated"] for r in results)
+            self.stdout.write(f"{updated} places actualizados.")
+
+        rate = places / elapsed if elapsed else float(places)
+        self.stdout.write(self.style.SUCCESS(
+            f"{places} places en {chunks} lotes · {len(households)} households · "
+            f"{workers} worker(s) · {elapsed:.2f}s ({rate:.0f} places/s)"
+        ))
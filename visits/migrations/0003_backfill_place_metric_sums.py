@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def backfill_place_metric_sums(apps, schema_editor):
+    """Rellena los acumulados de Place a partir de las visitas existentes."""
+    Place = apps.get_model("places", "Place")
+    Visit = apps.get_model("visits", "Visit")
+
+    rows = (
+        Visit.objects.values("place_id")
+        .annotate(
+            rating_sum=Sum("rating"),
+            priced_visits_count=Count("price_per_person"),
+            price_sum=Sum("price_per_person"),
+        )
+        .order_by()
+    )
+    for row in rows.iterator():
+        Place.objects.filter(id=row["place_id"]).update(
+            rating_sum=row["rating_sum"] or Decimal("0"),
+            priced_visits_count=row["priced_visits_count"] or 0,
+            price_sum=row["price_sum"] or Decimal("0"),
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("places", "0002_place_metric_sums"),
+        ("visits", "0002_visit_date_default"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_place_metric_sums, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.25 on 2026-10-18 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("visits", "0003_backfill_place_metric_sums"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="visit",
+            index=models.Index(
+                fields=["id", "place", "date"], name="idx_visit_id_place_date"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("visits", "0004_visit_id_place_date_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="visit",
+            name="household",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="visits",
+                to="accounts.household",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_visit_household(apps, schema_editor):
+    """Copia place.household en cada Visit con un único UPDATE."""
+    Place = apps.get_model("places", "Place")
+    Visit = apps.get_model("visits", "Visit")
+    Visit.objects.filter(household__isnull=True).update(
+        household_id=Subquery(
+            Place.objects.filter(pk=OuterRef("place_id")).values("household_id")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("visits", "0005_visit_household"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_visit_household, migrations.RunPython.noop),
+    ]
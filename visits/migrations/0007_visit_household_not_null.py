@@ -0,0 +1,28 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("visits", "0006_backfill_visit_household"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="visit",
+            name="household",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="visits",
+                to="accounts.household",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="visit",
+            index=models.Index(
+                fields=["household", "-date", "-created_at"],
+                name="idx_visit_hh_date_created",
+            ),
+        ),
+    ]
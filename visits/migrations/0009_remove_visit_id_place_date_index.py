@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-18 17:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("visits", "0008_visit_updated_at"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="visit",
+            name="idx_visit_id_place_date",
+        ),
+    ]
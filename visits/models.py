@@ -7,7 +7,7 @@ from django.utils import timezone
 
 from datetime import date
 
-from accounts.models import UserProfile
+from accounts.models import Household, UserProfile
 from places.models import Place
 
 
@@ -18,6 +18,10 @@ class Visit(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name="visits")
+    # Denormalizado de place.household: scope por tenant sin join (se rellena en save)
+    household = models.ForeignKey(
+        Household, on_delete=models.PROTECT, related_name="visits", editable=False
+    )
     author = models.ForeignKey(UserProfile, on_delete=models.PROTECT, related_name="visits")
 
     date = models.DateField(default=timezone.now)
@@ -27,12 +31,37 @@ class Visit(models.Model):
     comment = models.TextField(blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             Index(fields=["place", "date"], name="idx_visit_place_date"),
             Index(fields=["place", "created_at"], name="idx_visit_place_created"),
+            # Listado por household con el orden por defecto (-date, -created_at)
+            Index(fields=["household", "-date", "-created_at"], name="idx_visit_hh_date_created"),
         ]
 
     def __str__(self):
         return f"{self.place.name} · {self.date} · {self.rating}"
+
+    # Campos cuyo valor persistido necesitan las señales (métricas del Place, FoodPlaceLatest)
+    TRACKED_FIELDS = ("place_id", "rating", "price_per_person", "date")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Foto de los valores persistidos: las señales la usan para aplicar
+        # deltas (viejo vs nuevo) sin releer la fila.
+        if all(f in instance.__dict__ for f in cls.TRACKED_FIELDS):
+            instance.snapshot_values()
+        return instance
+
+    def snapshot_values(self):
+        self._loaded_values = {f: getattr(self, f) for f in self.TRACKED_FIELDS}
+
+    def save(self, *args, **kwargs):
+        if self.household_id is None and self.place_id is not None:
+            self.household_id = self.place.household_id
+        super().save(*args, **kwargs)
+        # Tras las señales post_save, la foto pasa a ser lo recién guardado
+        self.snapshot_values()
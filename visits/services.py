@@ -1,37 +1,270 @@
 # visits/services.py
+import threading
+from contextlib import contextmanager
 from decimal import Decimal
-from django.db.models import Avg, Count, Max
-from django.utils import timezone
+from django.db import connection, transaction
+from django.db.models import Avg, Case, Count, F, FloatField, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.db.models.lookups import GreaterThan
 
+from core.generations import record_changes
+from core.transactions import current_transaction_local, transaction_local
 from places.models import Place
 from .models import Visit
 
 
+ZERO = Decimal("0")
+
+
+def place_metric_aggregates() -> dict:
+    """
+    Agregados que definen las métricas de un Place a partir de sus visitas.
+    Las claves coinciden con los campos de Place; lo comparten el recálculo
+    individual y la reconstrucción masiva (rebuild_place_metrics).
+    """
+    return {
+        "visits_count": Count("id"),
+        "avg_rating": Avg("rating"),
+        "avg_price_pp": Avg("price_per_person"),
+        "rating_sum": Coalesce(Sum("rating"), Value(ZERO)),
+        "priced_visits_count": Count("price_per_person"),
+        "price_sum": Coalesce(Sum("price_per_person"), Value(ZERO)),
+        "last_visit_at": Max("created_at"),
+    }
+
+
+# Métricas de un Place sin visitas
+EMPTY_PLACE_METRICS = {
+    "visits_count": 0,
+    "avg_rating": None,
+    "avg_price_pp": None,
+    "rating_sum": ZERO,
+    "priced_visits_count": 0,
+    "price_sum": ZERO,
+    "last_visit_at": None,
+}
+
+
 def recompute_place_metrics(place_id: str) -> None:
     """
     Recalcula avg_rating, avg_price_pp, visits_count, last_visit_at para un Place.
     - avg_price_pp solo con visitas que tengan price_per_person válido (>= 0)
+    - Reescribe también los acumulados (rating_sum, priced_visits_count, price_sum).
+
+    Es la ruta de reparación: el día a día se mantiene con apply_place_metrics_delta.
+    Un solo UPDATE con los agregados como subconsultas, con la fila del Place ya
+    bloqueada: un delta concurrente espera al recálculo o ya está incluido en él.
+    Lanza Place.DoesNotExist si el Place no existe.
+    """
+    visits = Visit.objects.filter(place_id=OuterRef("pk")).order_by().values("place_id")
+    updates = {}
+    for field, aggregate in place_metric_aggregates().items():
+        value = Subquery(
+            visits.annotate(value=aggregate).values("value")[:1], output_field=Place._meta.get_field(field)
+        )
+        empty = EMPTY_PLACE_METRICS[field]
+        updates[field] = value if empty is None else Coalesce(value, Value(empty))
+
+    with transaction.atomic(savepoint=False):
+        if not Place.objects.select_for_update().filter(id=place_id).values_list("id"):
+            raise Place.DoesNotExist(place_id)
+        Place.objects.filter(id=place_id).update(**updates)
+
+
+def rebuild_place_metrics_bulk(place_ids) -> int:
+    """
+    Recalcula de golpe las métricas de un lote de Places (mismos agregados que
+    recompute_place_metrics) con dos sentencias:
+    - UPDATE ... FROM (agregado agrupado por place) para los que tienen visitas.
+    - UPDATE a valores vacíos para los que ya no tienen ninguna.
+    Devuelve el número de Places actualizados.
     """
-    agg = Visit.objects.filter(place_id=place_id).aggregate(
-        visits_count=Count("id"),
-        avg_rating=Avg("rating"),
-        avg_price_pp=Avg("price_per_person"),
-        last_by_date=Max("date"),
-        last_by_created=Max("created_at"),
+    place_ids = list(place_ids)
+    if not place_ids:
+        return 0
+
+    fields = list(place_metric_aggregates())
+    agg_qs = (
+        Visit.objects.filter(place_id__in=place_ids)
+        .values("place_id")
+        .annotate(**place_metric_aggregates())
+        .order_by()
+    )
+    agg_sql, agg_params = agg_qs.query.sql_with_params()
+
+    table = connection.ops.quote_name(Place._meta.db_table)
+    pk = connection.ops.quote_name(Place._meta.pk.column)
+    assignments = ", ".join(
+        f"{connection.ops.quote_name(Place._meta.get_field(f).column)} = agg.{connection.ops.quote_name(f)}"
+        for f in fields
+    )
+    sql = (
+        f"UPDATE {table} SET {assignments} "
+        f"FROM ({agg_sql}) AS agg WHERE {table}.{pk} = agg.{connection.ops.quote_name('place_id')}"
     )
 
-    place = Place.objects.get(id=place_id)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, agg_params)
+            updated = cursor.rowcount
+        updated += (
+            Place.objects.filter(id__in=place_ids)
+            .exclude(id__in=Visit.objects.filter(place_id__in=place_ids).values("place_id"))
+            .update(**EMPTY_PLACE_METRICS)
+        )
+        # Los UPDATE no lanzan señales: sincronización y caché de los Places reescritos
+        by_household = {}
+        for place_id, household_id in Place.objects.filter(id__in=place_ids).values_list("id", "household_id"):
+            by_household.setdefault(household_id, []).append(("places.Place", place_id, False))
+        for household_id, changes in by_household.items():
+            record_changes(household_id, changes)
+    return updated
 
-    place.visits_count = agg["visits_count"] or 0
-    place.avg_rating = (agg["avg_rating"] or None)
-    place.avg_price_pp = (agg["avg_price_pp"] or None)
 
-    # Tomamos como referencia la última creación (más precisa en el tiempo);
-    # si no hay, usamos la última fecha.
-    place.last_visit_at = agg["last_by_created"] or (
-        timezone.make_aware(
-            timezone.datetime.combine(agg["last_by_date"], timezone.datetime.min.time())
-        ) if agg["last_by_date"] else None
+def visit_contribution(rating, price_per_person) -> dict:
+    """
+    Lo que una visita aporta a los acumulados de su Place.
+    Sirve para construir los deltas de apply_place_metrics_delta (sumar/restar).
+    """
+    priced = price_per_person is not None
+    return {
+        "visits": 1,
+        "rating": Decimal(str(rating)),
+        "priced": 1 if priced else 0,
+        "price": Decimal(str(price_per_person)) if priced else ZERO,
+    }
+
+
+def _safe_avg(total, count):
+    # Cast a float para evitar la división entera de SQLite cuando la suma es exacta
+    return Case(
+        When(GreaterThan(count, 0), then=Cast(total, FloatField()) / count),
+        default=Value(None),
+        output_field=FloatField(),
     )
 
-    place.save(update_fields=["visits_count", "avg_rating", "avg_price_pp", "last_visit_at"])
+
+def apply_place_metrics_delta(
+    place_id,
+    *,
+    visits: int = 0,
+    rating: Decimal = ZERO,
+    priced: int = 0,
+    price: Decimal = ZERO,
+    last_visit_at=None,
+    refresh_last_visit: bool = False,
+) -> None:
+    """
+    Aplica un delta a las métricas de un Place con un único UPDATE atómico (F()).
+    - visits/rating/priced/price se suman a los acumulados (negativos para restar).
+    - avg_rating y avg_price_pp se derivan de los acumulados en la misma sentencia.
+    - last_visit_at: si se indica, se queda con el máximo entre el actual y el nuevo.
+    - refresh_last_visit: relee el último created_at vía idx_visit_place_created (tras borrar).
+    """
+    visits_count = F("visits_count") + visits
+    rating_sum = F("rating_sum") + Value(rating)
+    priced_visits_count = F("priced_visits_count") + priced
+    price_sum = F("price_sum") + Value(price)
+
+    updates = {
+        "visits_count": visits_count,
+        "rating_sum": rating_sum,
+        "priced_visits_count": priced_visits_count,
+        "price_sum": price_sum,
+        "avg_rating": _safe_avg(rating_sum, visits_count),
+        "avg_price_pp": _safe_avg(price_sum, priced_visits_count),
+    }
+
+    if refresh_last_visit:
+        updates["last_visit_at"] = Subquery(
+            Visit.objects.filter(place_id=OuterRef("pk"))
+            .order_by("-created_at")
+            .values("created_at")[:1]
+        )
+    elif last_visit_at is not None:
+        updates["last_visit_at"] = Greatest(
+            Coalesce(F("last_visit_at"), Value(last_visit_at)), Value(last_visit_at)
+        )
+
+    Place.objects.filter(id=place_id).update(**updates)
+
+
+# ------------------------------------------------------------
+# Coalescing: un recálculo por Place y transacción
+# ------------------------------------------------------------
+
+_dirty = threading.local()
+
+# Clave de transaction_local() con los Places pendientes de la transacción en curso
+DIRTY_PLACES = "visits.dirty_places"
+
+
+def _dirty_state():
+    if not hasattr(_dirty, "place_ids"):
+        _dirty.place_ids = set()
+        _dirty.defer_depth = 0
+    return _dirty
+
+
+def place_metrics_deferred() -> bool:
+    """
+    True si las señales deben limitarse a marcar el Place como "sucio": dentro de
+    defer_place_metrics(). El resto de escrituras aplican su delta en el momento.
+    """
+    return _dirty_state().defer_depth > 0
+
+
+def mark_place_dirty(*place_ids) -> None:
+    """
+    Apunta Places cuyas métricas hay que recalcular (deduplicados).
+    Dentro de una transacción se recalculan una sola vez al confirmarla, y si hace
+    rollback se olvidan; fuera, al salir de defer_place_metrics() (o en el momento).
+    """
+    place_ids = {pid for pid in place_ids if pid is not None}
+    if transaction.get_connection().in_atomic_block:
+        transaction_local(DIRTY_PLACES, set, _recompute_places).update(place_ids)
+        return
+    state = _dirty_state()
+    state.place_ids.update(place_ids)
+    if not state.defer_depth:
+        flush_dirty_places()
+
+
+def flush_dirty_places() -> None:
+    """
+    Recalcula ya cada Place pendiente, de la transacción en curso y de
+    defer_place_metrics(). Llamadas posteriores sin pendientes no hacen nada.
+    """
+    pending = current_transaction_local(DIRTY_PLACES)
+    if pending:
+        _recompute_places(pending)
+    _recompute_places(_dirty_state().place_ids)
+
+
+def _recompute_places(place_ids) -> None:
+    while place_ids:
+        try:
+            recompute_place_metrics(place_ids.pop())
+        except Place.DoesNotExist:
+            pass  # el Place se borró en la misma transacción
+
+
+@contextmanager
+def defer_place_metrics():
+    """
+    Agrupa el mantenimiento de métricas de todo el bloque: cada Place tocado se
+    recalcula una vez al salir (o en on_commit si hay una transacción abierta).
+    Pensado para escrituras masivas y management commands:
+
+        with defer_place_metrics():
+            for row in rows:
+                Visit.objects.create(...)
+    """
+    state = _dirty_state()
+    state.defer_depth += 1
+    try:
+        yield
+    finally:
+        state.defer_depth -= 1
+        if not state.defer_depth and not transaction.get_connection().in_atomic_block:
+            flush_dirty_places()
@@ -3,14 +3,64 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from .models import Visit
-from .services import recompute_place_metrics
+from .services import (
+    apply_place_metrics_delta,
+    mark_place_dirty,
+    place_metrics_deferred,
+    recompute_place_metrics,
+    visit_contribution,
+)
+
+
+def _negate(contribution: dict) -> dict:
+    return {k: -v for k, v in contribution.items()}
+
+
+def _multi_row_delete(instance, origin) -> bool:
+    """Borrado de varias filas (queryset o en cascada): origin no es la propia visita."""
+    return origin is not None and origin is not instance
 
 
 @receiver(post_save, sender=Visit)
-def visit_saved(sender, instance: Visit, created, **kwargs):
-    recompute_place_metrics(instance.place_id)
+def visit_saved(sender, instance: Visit, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {"place", "place_id", "rating", "price_per_person"} & set(update_fields):
+        return  # el save no toca nada que afecte a las métricas
+
+    old_values = getattr(instance, "_loaded_values", None)
+
+    if place_metrics_deferred():
+        # defer_place_metrics(): se recalcula una vez por Place al terminar
+        mark_place_dirty(instance.place_id, old_values and old_values["place_id"])
+        return
+
+    new = visit_contribution(instance.rating, instance.price_per_person)
+
+    if created:
+        apply_place_metrics_delta(instance.place_id, last_visit_at=instance.created_at, **new)
+    else:
+        if old_values is None:
+            # No sabemos qué había antes: reparación completa
+            recompute_place_metrics(instance.place_id)
+        else:
+            old = visit_contribution(old_values["rating"], old_values["price_per_person"])
+            if old_values["place_id"] != instance.place_id:
+                apply_place_metrics_delta(old_values["place_id"], refresh_last_visit=True, **_negate(old))
+                apply_place_metrics_delta(instance.place_id, last_visit_at=instance.created_at, **new)
+            else:
+                delta = {k: new[k] - old[k] for k in new}
+                if any(delta.values()):
+                    apply_place_metrics_delta(instance.place_id, **delta)
 
 
 @receiver(post_delete, sender=Visit)
-def visit_deleted(sender, instance: Visit, **kwargs):
-    recompute_place_metrics(instance.place_id)
+def visit_deleted(sender, instance: Visit, origin=None, **kwargs):
+    old_values = getattr(instance, "_loaded_values", None)
+    if place_metrics_deferred() or _multi_row_delete(instance, origin):
+        # Muchas visitas a la vez: un recálculo por Place en vez de un UPDATE por visita
+        mark_place_dirty(instance.place_id, old_values and old_values["place_id"])
+        return
+    if old_values is None:
+        recompute_place_metrics(instance.place_id)
+        return
+    old = visit_contribution(old_values["rating"], old_values["price_per_person"])
+    apply_place_metrics_delta(old_values["place_id"], refresh_last_visit=True, **_negate(old))
@@ -0,0 +1,273 @@
+# visits/tests.py
+import datetime
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from accounts.models import Household
+from categorization.models import PlaceType, Tag
+from foods.models import Food, VisitFood
+from places.models import Place, PlaceTag
+from .models import Visit
+from .services import defer_place_metrics, recompute_place_metrics
+
+
+class PlaceMetricsTestMixin:
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ana", password="x")
+        cls.household = cls.user.profile.household
+        cls.place_type = PlaceType.objects.create(name="Restaurante")
+
+    def setUp(self):
+        self.place = Place.objects.create(household=self.household, name="Casa Pepe", place_type=self.place_type)
+
+    def create_visit(self, rating, price=None, place=None):
+        return Visit.objects.create(
+            place=place or self.place, author=self.user.profile, date=datetime.date(2024, 5, 1),
+            rating=Decimal(rating), price_per_person=None if price is None else Decimal(price),
+        )
+
+    def assert_metrics(self, place, visits, rating_sum, avg_rating, priced, price_sum, avg_price):
+        place.refresh_from_db()
+        self.assertEqual(
+            (place.visits_count, place.rating_sum, place.priced_visits_count, place.price_sum),
+            (visits, Decimal(rating_sum), priced, Decimal(price_sum)),
+        )
+        self.assertEqual(place.avg_rating, None if avg_rating is None else Decimal(avg_rating))
+        self.assertEqual(place.avg_price_pp, None if avg_price is None else Decimal(avg_price))
+
+
+class RecomputePlaceMetricsTests(PlaceMetricsTestMixin, TestCase):
+
+    def test_recompute_repairs_metrics(self):
+        first = self.create_visit("8", "20")
+        last = self.create_visit("6")
+        Place.objects.filter(pk=self.place.pk).update(
+            visits_count=99, rating_sum=0, priced_visits_count=0, price_sum=0, avg_rating=None, last_visit_at=None
+        )
+
+        recompute_place_metrics(self.place.pk)
+
+        self.assert_metrics(self.place, 2, "14", "7.0", 1, "20", "20.00")
+        self.assertEqual(self.place.last_visit_at, max(first.created_at, last.created_at))
+
+    def test_recompute_without_visits_resets_metrics(self):
+        Place.objects.filter(pk=self.place.pk).update(visits_count=3, rating_sum=24, avg_rating=8)
+        recompute_place_metrics(self.place.pk)
+        self.assert_metrics(self.place, 0, "0", None, 0, "0", None)
+        self.assertIsNone(self.place.last_visit_at)
+
+    def test_recompute_missing_place(self):
+        self.place.delete()
+        with self.assertRaises(Place.DoesNotExist):
+            recompute_place_metrics(self.place.pk)
+
+    def test_recompute_is_a_single_update(self):
+        self.create_visit("8")
+        with CaptureQueriesContext(connection) as queries:
+            recompute_place_metrics(self.place.pk)
+        # Los agregados van dentro del UPDATE, no en una lectura previa
+        updates = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertIn("AVG(", updates[0].upper())
+        self.assertFalse([q["sql"] for q in queries if q["sql"].startswith("SELECT") and "AVG(" in q["sql"].upper()])
+
+
+class PlaceMetricsDeltaTests(PlaceMetricsTestMixin, TestCase):
+    """Altas, cambios y bajas de visitas mantienen las métricas con deltas F()."""
+
+    def test_create(self):
+        self.create_visit("8", "20")
+        newer = self.create_visit("5")
+        self.assert_metrics(self.place, 2, "13", "6.5", 1, "20", "20.00")
+        self.assertEqual(self.place.last_visit_at, newer.created_at)
+
+    def test_update_rating_and_price(self):
+        visit = self.create_visit("8", "20")
+        self.create_visit("6", "10")
+        visit = Visit.objects.get(pk=visit.pk)
+        visit.rating, visit.price_per_person = Decimal("4"), None
+        visit.save()
+        self.assert_metrics(self.place, 2, "10", "5.0", 1, "10", "10.00")
+
+    def test_move_to_another_place(self):
+        other = Place.objects.create(household=self.household, name="Otro", place_type=self.place_type)
+        visit = self.create_visit("8", "20")
+        self.create_visit("6")
+        visit = Visit.objects.get(pk=visit.pk)
+        visit.place = other
+        visit.save()
+        self.assert_metrics(self.place, 1, "6", "6.0", 0, "0", None)
+        self.assert_metrics(other, 1, "8", "8.0", 1, "20", "20.00")
+
+    def test_delete(self):
+        older = self.create_visit("8", "20")
+        newer = self.create_visit("6")
+        Visit.objects.get(pk=newer.pk).delete()
+        self.assert_metrics(self.place, 1, "8", "8.0", 1, "20", "20.00")
+        self.assertEqual(self.place.last_visit_at, older.created_at)
+        Visit.objects.get(pk=older.pk).delete()
+        self.assert_metrics(self.place, 0, "0", None, 0, "0", None)
+        self.assertIsNone(self.place.last_visit_at)
+
+    def test_write_does_not_aggregate_all_visits(self):
+        for rating in ("4", "6", "8"):
+            self.create_visit(rating)
+        visit = Visit.objects.get(pk=self.create_visit("7").pk)
+        visit.rating = Decimal("9")
+        with CaptureQueriesContext(connection) as queries:
+            visit.save()
+        self.assertFalse([q["sql"] for q in queries if "AVG(" in q["sql"].upper()])
+        self.assert_metrics(self.place, 4, "27", "6.8", 0, "0", None)  # 6.75 con un decimal
+
+    def test_queryset_delete_recomputes_once(self):
+        for rating in ("4", "6", "8"):
+            self.create_visit(rating)
+        with self.captureOnCommitCallbacks(execute=True):
+            Visit.objects.filter(rating__gte=6).delete()
+        self.assert_metrics(self.place, 1, "4", "4.0", 0, "0", None)
+
+
+class DeferPlaceMetricsTests(PlaceMetricsTestMixin, TestCase):
+
+    def test_deferred_writes_recompute_once_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            with defer_place_metrics():
+                for rating in ("4", "6", "8"):
+                    self.create_visit(rating)
+            self.assert_metrics(self.place, 0, "0", None, 0, "0", None)  # aún sin recalcular
+        for callback in callbacks:
+            callback()
+        self.assert_metrics(self.place, 3, "18", "6.0", 0, "0", None)
+
+
+class CreateWithFoodsTests(PlaceMetricsTestMixin, APITestCase):
+    url = "/api/v1/visits/create-with-foods/"
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def post(self, foods, **body):
+        body = {"place": str(self.place.pk), "date": "2024-05-01", "rating": "8", "foods": foods, **body}
+        return self.client.post(self.url, body, format="json")
+
+    def test_resolves_ids_and_names(self):
+        existing = Food.objects.create(household=self.household, name="Ñoquis")
+        response = self.post([
+            {"food": str(existing.pk), "rating": "9"},
+            {"name": "ÑOQUIS"},  # mismo Food, sin distinguir mayúsculas
+            {"name": "Tarta de queso", "price_paid": "6.50"},
+            {"name": "tarta de QUESO"},
+        ])
+        self.assertEqual(response.status_code, 201)
+        visit = Visit.objects.get(pk=response.json()["visit_id"])
+        foods = sorted(VisitFood.objects.filter(visit=visit).values_list("food__name", "rating"))
+        self.assertEqual(foods, [
+            ("Tarta de queso", Decimal("8")), ("Tarta de queso", Decimal("8")),
+            ("Ñoquis", Decimal("8")), ("Ñoquis", Decimal("9")),
+        ])
+        self.assertEqual(Food.objects.filter(household=self.household).count(), 2)
+        self.assert_metrics(self.place, 1, "8", "8.0", 0, "0", None)
+
+    def test_query_count_does_not_grow_with_foods(self):
+        def post(n):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(
+                    [{"name": f"Plato {n}-{i}"} for i in range(n)] + [{"food": str(food.pk)} for food in existing[:n]]
+                )
+            self.assertEqual(response.status_code, 201)
+            return len(queries)
+
+        existing = [Food.objects.create(household=self.household, name=f"Existente {i}") for i in range(10)]
+        post(2)  # la primera escritura crea filas auxiliares (contadores del household)
+        self.assertEqual(post(1), post(10))
+
+    def test_food_from_another_household_creates_nothing(self):
+        foreign = Food.objects.create(household=Household.objects.create(name="Otra casa"), name="Ajeno")
+        response = self.post([{"name": "Nuevo"}, {"food": str(foreign.pk)}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Visit.objects.exists())
+        self.assertFalse(Food.objects.filter(name="Nuevo").exists())
+
+    def test_place_from_another_household(self):
+        other = Place.objects.create(
+            household=Household.objects.create(name="Otra casa"), name="Ajeno", place_type=self.place_type
+        )
+        response = self.post([], place=str(other.pk))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("place", response.json())
+        self.assertFalse(Visit.objects.exists())
+
+
+class ImportTests(PlaceMetricsTestMixin, APITestCase):
+    url = "/api/v1/visits/import/"
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def run_import(self, lines, batch_size=2):
+        body = "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"{self.url}?batch_size={batch_size}", body, content_type="application/x-ndjson"
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_imports_in_batches(self):
+        croquetas = Food.objects.create(household=self.household, name="Croquetas")
+        report = self.run_import([
+            {"place_name": "CASA PEPE", "date": "2023-01-01", "rating": 8, "price_per_person": 20,
+             "foods": [{"name": "Pulpo"}, {"food": str(croquetas.pk), "rating": 9}], "place_tags": ["Terraza"]},
+            {"place": str(self.place.pk), "date": "2023-02-01", "rating": 6, "foods": [{"name": "pulpo"}]},
+            "",
+            {"place_name": "casa pepe", "date": "2023-03-01", "rating": 7, "place_tags": ["terraza"]},
+        ])
+        self.assertEqual(report, {"lines": 3, "visits_created": 3, "visit_foods_created": 3, "errors": []})
+        self.assertEqual(Food.objects.filter(household=self.household, name__iexact="pulpo").count(), 1)
+        self.assertEqual(list(Tag.objects.values_list("name", flat=True)), ["Terraza"])
+        self.assertEqual(PlaceTag.objects.filter(place=self.place).count(), 1)
+        self.assert_metrics(self.place, 3, "21", "7.0", 1, "20", "20.00")
+
+    def test_reports_errors_per_line(self):
+        Place.objects.create(household=self.household, name="Dup", place_type=self.place_type)
+        Place.objects.create(household=self.household, name="dup", place_type=self.place_type)
+        foreign = Food.objects.create(household=Household.objects.create(name="Otra casa"), name="Ajeno")
+        report = self.run_import([
+            "no es json",
+            {"place_name": "Casa Pepe", "rating": 50},
+            {"rating": 5},
+            {"place_name": "dup", "rating": 5},
+            {"place": "00000000-0000-0000-0000-000000000000", "rating": 5},
+            {"place_name": "Casa Pepe", "rating": 5, "foods": [{"food": str(foreign.pk)}]},
+            {"place_name": "Casa Pepe", "date": "2023-01-01", "rating": 5},
+        ])
+        self.assertEqual(report["visits_created"], 1)
+        errors = {error["line"]: error["errors"] for error in report["errors"]}
+        self.assertEqual(sorted(errors), [1, 2, 3, 4, 5, 6])
+        self.assertIn("rating", errors[2])
+        self.assertIn("place", errors[3])
+        self.assertIn("place_name", errors[4])
+        self.assertIn("place", errors[5])
+        self.assertIn("foods", errors[6])
+        self.assertFalse(VisitFood.objects.exists())
+        self.assert_metrics(self.place, 1, "5", "5.0", 0, "0", None)
+
+    def test_queries_per_batch_do_not_grow_with_lines(self):
+        def run(n):
+            line = {"place_name": "Casa Pepe", "date": "2023-01-01", "rating": 8, "foods": [{"name": "Pulpo"}]}
+            with CaptureQueriesContext(connection) as queries:
+                self.run_import([line] * n, batch_size=n)
+            return len(queries)
+
+        run(1)  # crea el Food y las filas auxiliares
+        self.assertEqual(run(2), run(20))